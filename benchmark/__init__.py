@@ -0,0 +1 @@
+# perf_appium 基准测试，详见 run.py
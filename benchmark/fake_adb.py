@@ -0,0 +1,89 @@
+"""
+模拟的 AdbProxy，只实现 AndroidBaseUI 用到的接口，并记录每次调用，用于统计 adb 往返次数
+"""
+import time
+from collections import Counter
+
+
+class FakeDeviceInfo:
+    def __init__(self, brand: str = 'fake', os_version: str = '12', model: str = 'bench'):
+        self.brand = brand
+        self.os_version = os_version
+        self.model = model
+
+
+class FakeAdbProxy:
+
+    def __init__(self, serial: str = 'fake-device', latency: float = 0.0, resolution=(1080, 2340)):
+        self.serial = serial
+        self.latency = latency
+        self.resolution = resolution
+        self.calls = Counter()
+        self.shell_history = []
+        self.apps = {}
+
+    @property
+    def round_trips(self) -> int:
+        return sum(self.calls.values())
+
+    def _call(self, name: str):
+        self.calls[name] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def run_shell(self, cmd: str, clean_wrap=False) -> str:
+        self._call('run_shell')
+        self.shell_history.append(cmd)
+        return ''
+
+    def stream_shell(self, cmd: str):
+        self._call('stream_shell')
+        yield from ()
+
+    def close(self):
+        pass
+
+    def get_device_serial(self) -> str:
+        self._call('get_device_serial')
+        return self.serial
+
+    def get_device_info(self) -> FakeDeviceInfo:
+        self._call('get_device_info')
+        return FakeDeviceInfo()
+
+    def get_device_resolution(self):
+        self._call('get_device_resolution')
+        return self.resolution
+
+    def home(self):
+        self._call('home')
+
+    def go_back(self):
+        self._call('go_back')
+
+    def task_manager(self):
+        self._call('task_manager')
+
+    def input(self, value: str):
+        self._call('input')
+
+    def launch_app(self, pkg: str, activity: str = None):
+        self._call('launch_app')
+
+    def kill_app(self, pkg: str):
+        self._call('kill_app')
+
+    def clear_app(self, pkg: str):
+        self._call('clear_app')
+        return 'Success'
+
+    def install_app(self, apk_path: str):
+        self._call('install_app')
+
+    def uninstall_app(self, pkg: str):
+        self._call('uninstall_app')
+        self.apps.pop(pkg, None)
+
+    def get_app_version(self, pkg: str) -> str:
+        self._call('get_app_version')
+        return self.apps.get(pkg, '')
@@ -0,0 +1,259 @@
+"""
+本地模拟的 W3C/Appium 服务，用于在没有真机和 Appium 服务的环境下测量 perf_appium 的往返次数、耗时及内存。
+- page_source 由 make_page_source 按指定节点数生成
+- 每个请求可注入固定延迟
+- `mobile: shell` 在本机 sh 中执行，设备文件路径对应本机路径
+- GET /__stats 返回各类请求次数，POST /__reset 清零，便于在独立进程中运行：
+    python -m benchmark.fake_appium --latency 0.005 --nodes 500
+"""
+import re
+import sys
+import argparse
+import json
+import time
+import uuid
+import base64
+import threading
+import subprocess
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from perf_appium.local_locator import LocalHierarchy
+
+ELEMENT_KEY = 'element-6066-11e4-a52e-4f735466cecf'
+APP_ID = 'com.example.bench'
+
+
+def make_page_source(nodes: int = 500, app_id: str = APP_ID) -> str:
+    """生成类似 RecyclerView 列表的界面结构，资源 id 为 item_0 ... item_{nodes-1}"""
+    rows = []
+    for i in range(nodes):
+        y = 100 + i * 50
+        rows.append(
+            f'<android.widget.TextView index="{i}" package="{app_id}" class="android.widget.TextView" '
+            f'text="Item {i}" resource-id="{app_id}:id/item_{i}" content-desc="desc_{i}" checkable="false" '
+            f'checked="false" clickable="true" enabled="true" focusable="true" focused="false" long-clickable="false" '
+            f'password="false" scrollable="false" selected="false" bounds="[0,{y}][1080,{y + 50}]" displayed="true" />')
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<hierarchy index="0" class="hierarchy" rotation="0" width="1080" height="2340">'
+        f'<androidx.recyclerview.widget.RecyclerView index="0" package="{app_id}" '
+        f'class="androidx.recyclerview.widget.RecyclerView" resource-id="{app_id}:id/list" scrollable="true" '
+        'bounds="[0,100][1080,2340]" displayed="true">'
+        + ''.join(rows) +
+        '</androidx.recyclerview.widget.RecyclerView></hierarchy>')
+
+
+class FakeAppiumServer:
+    """
+    with FakeAppiumServer(latency=0.005, nodes=500) as server:
+        dev = AppiumDevice.open_remote_driver(server.url, platformName='Android')
+    """
+
+    def __init__(self, latency: float = 0.0, nodes: int = 500, host: str = '127.0.0.1', port: int = 0):
+        self.latency = latency
+        self.page_source = make_page_source(nodes)
+        self.hierarchy = LocalHierarchy(self.page_source)
+        self.requests = Counter()
+        self.sessions = {}
+        self.elements = {}
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f'http://{host}:{port}/wd/hub'
+
+    @property
+    def round_trips(self) -> int:
+        with self._lock:
+            return sum(self.requests.values())
+
+    def reset_counters(self):
+        with self._lock:
+            self.requests.clear()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name='fake-appium', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    # ---- 请求处理 ----
+
+    def _count(self, name: str):
+        with self._lock:
+            self.requests[name] += 1
+
+    def _find(self, using: str, value: str):
+        rs = self.hierarchy.find_all(value, using)
+        if rs is None:
+            return None
+        ids = []
+        with self._lock:
+            for e in rs:
+                eid = uuid.uuid4().hex
+                self.elements[eid] = e
+                ids.append(eid)
+        return ids
+
+    @staticmethod
+    def _mobile_shell(args: dict):
+        # 与 Appium 一致：退出码非零时返回错误，而不是 stdout/stderr
+        p = subprocess.run(['sh', '-c', args['command']], stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                           timeout=(args.get('timeout') or 20000) / 1000)
+        stdout, stderr = p.stdout.decode('utf-8', 'replace'), p.stderr.decode('utf-8', 'replace')
+        if p.returncode:
+            return 500, {'error': 'unknown error',
+                         'message': f"Error executing adbExec. Original error: 'Command '{args['command']}' "
+                                    f"exited with code {p.returncode}'; Command output: {stderr or stdout}"}
+        return 200, {'stdout': stdout, 'stderr': stderr}
+
+    def dispatch(self, method: str, path: str, body: dict):
+        """返回 (状态码, value)"""
+        if path == '/__stats':
+            with self._lock:
+                return 200, dict(self.requests)
+        if path == '/__reset':
+            self.reset_counters()
+            return 200, None
+        if method == 'POST' and path == '/session':
+            caps = body.get('capabilities', {}).get('alwaysMatch', {})
+            desired = {k[len('appium:'):] if k.startswith('appium:') else k: v for k, v in caps.items()}
+            sid = uuid.uuid4().hex
+            with self._lock:
+                self.sessions[sid] = desired
+            self._count('new_session')
+            return 200, {'sessionId': sid, 'capabilities': dict(desired, desired=desired, deviceName='fake-device')}
+        m = re.match(r'^/session/([^/]+)(/.*)?$', path)
+        if not m:
+            return 404, {'error': 'unknown command', 'message': path}
+        sid, sub = m.group(1), m.group(2) or ''
+        if sid not in self.sessions:
+            return 404, {'error': 'invalid session id', 'message': sid}
+        name = f'{method} {re.sub(r"/element/[0-9a-f]{32}", "/element/:id", sub) or "/"}'
+        self._count(name)
+        if method == 'DELETE' and not sub:
+            with self._lock:
+                del self.sessions[sid]
+            return 200, None
+        if sub == '/source':
+            return 200, self.page_source
+        if sub == '/timeouts':
+            return 200, {'implicit': 0, 'pageLoad': 300000, 'script': 30000}
+        if sub == '/window/rect':
+            return 200, {'x': 0, 'y': 0, 'width': 1080, 'height': 2340}
+        if sub in ('/element', '/elements'):
+            ids = self._find(body['using'], body['value'])
+            if ids is None:
+                return 400, {'error': 'invalid selector', 'message': body['value']}
+            if sub == '/elements':
+                return 200, [{ELEMENT_KEY: i} for i in ids]
+            if not ids:
+                return 404, {'error': 'no such element', 'message': body['value']}
+            return 200, {ELEMENT_KEY: ids[0]}
+        m = re.match(r'^/element/([0-9a-f]{32})/(click|text|rect)$', sub)
+        if m:
+            with self._lock:
+                e = self.elements.get(m.group(1))
+            if e is None:
+                return 404, {'error': 'stale element reference', 'message': m.group(1)}
+            if m.group(2) == 'text':
+                return 200, e.text
+            if m.group(2) == 'rect':
+                return 200, e.rect
+            return 200, None
+        if sub == '/actions':
+            return 200, None
+        if sub == '/execute/sync':
+            script, args = body.get('script'), (body.get('args') or [{}])[0]
+            if script == 'mobile: shell':
+                return self._mobile_shell(args)
+            if script == 'mobile: pullFile':
+                with open(args['remotePath'], 'rb') as f:
+                    return 200, base64.b64encode(f.read()).decode()
+            if script == 'mobile: pushFile':
+                with open(args['remotePath'], 'wb') as f:
+                    f.write(base64.b64decode(args['payload']))
+            return 200, None
+        if sub == '/appium/device/pull_file':
+            with open(body['path'], 'rb') as f:
+                return 200, base64.b64encode(f.read()).decode()
+        if sub == '/appium/device/push_file':
+            with open(body['path'], 'wb') as f:
+                f.write(base64.b64decode(body['data']))
+            return 200, None
+        return 404, {'error': 'unknown command', 'message': f'{method} {sub}'}
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def _handle(self, method: str):
+                n = int(self.headers.get('Content-Length') or 0)
+                body = json.loads(self.rfile.read(n) or b'{}') if n else {}
+                if server.latency:
+                    time.sleep(server.latency)
+                path = self.path.split('?')[0]
+                if path.startswith('/wd/hub'):
+                    path = path[len('/wd/hub'):]
+                try:
+                    status, value = server.dispatch(method, path.rstrip('/') or '/', body)
+                except Exception as e:
+                    status, value = 500, {'error': 'unknown error', 'message': str(e)}
+                data = json.dumps({'value': value}).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._handle('GET')
+
+            def do_POST(self):
+                self._handle('POST')
+
+            def do_DELETE(self):
+                self._handle('DELETE')
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fake Appium server for perf_appium benchmarks')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=0)
+    parser.add_argument('--latency', type=float, default=0.0, help='每个请求注入的延迟（秒）')
+    parser.add_argument('--nodes', type=int, default=500, help='page_source 中的列表节点数')
+    args = parser.parse_args()
+    server = FakeAppiumServer(args.latency, args.nodes, args.host, args.port)
+    print(server.url, flush=True)
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._httpd.server_close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
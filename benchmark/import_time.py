@@ -0,0 +1,99 @@
+"""
+统计 `import perf_appium` 的耗时（python -X importtime），并检查是否提前导入了重量级依赖。
+结果与 baseline.json 中的 `import_*` 项比较，出现退化时以非 0 退出码结束。
+
+    python -m benchmark.import_time
+    python -m benchmark.import_time --update-baseline
+"""
+import os
+import re
+import sys
+import json
+import argparse
+import subprocess
+from typing import Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE = os.path.join(ROOT, 'benchmark', 'baseline.json')
+
+# 仅导入包本身时不应加载的模块
+HEAVY_MODULES = ('appium', 'selenium', 'android_perf', 'urllib3')
+
+# 被测的导入语句：名称 -> (语句, 不应加载的模块)
+TARGETS = {
+    'import_perf_appium': ('import perf_appium', HEAVY_MODULES),
+    'import_resource': ('from perf_appium.resource import AndroidResourceBase', HEAVY_MODULES),
+    'import_mk_xpath': ('from perf_appium import mk_xpath', HEAVY_MODULES),
+}
+
+_LINE_RE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)$')
+
+
+def import_time(stmt: str) -> Dict[str, float]:
+    """
+    在新进程中执行导入语句
+    :return: {顶层导入的模块: 累计耗时 ms}
+    """
+    p = subprocess.run([sys.executable, '-X', 'importtime', '-c', stmt], stderr=subprocess.PIPE,
+                       stdout=subprocess.DEVNULL, cwd=ROOT, check=True)
+    modules = {}
+    for line in p.stderr.decode().splitlines():
+        m = _LINE_RE.match(line)
+        if m and len(m.group(3)) == 1:
+            modules[m.group(4)] = int(m.group(2)) / 1000
+    return modules
+
+
+def measure(stmt: str, forbidden: Tuple[str, ...], repeat: int) -> Tuple[dict, List[str]]:
+    # 解释器启动（site 等）时的导入不计入
+    startup = set(import_time('pass'))
+    totals = []
+    for i in range(repeat):
+        totals.append(sum(v for k, v in import_time(stmt).items() if k not in startup))
+    p = subprocess.run([sys.executable, '-c', f'{stmt}\nimport sys\nprint("\\n".join(sys.modules))'],
+                       stdout=subprocess.PIPE, cwd=ROOT, check=True)
+    names = p.stdout.decode().split()
+    heavy = sorted({n.split('.')[0] for n in names} & set(forbidden))
+    totals.sort()
+    return {'import_ms': round(totals[len(totals) // 2], 2), 'modules': len(names)}, heavy
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='perf_appium import time benchmark')
+    parser.add_argument('--repeat', type=int, default=5, help='重复次数，耗时取中位数')
+    parser.add_argument('--tolerance', type=float, default=0.5, help='耗时允许的退化比例')
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--update-baseline', action='store_true')
+    args = parser.parse_args(argv)
+
+    results = {}
+    errors = []
+    for name, (stmt, forbidden) in TARGETS.items():
+        rs, heavy = measure(stmt, forbidden, args.repeat)
+        results[name] = rs
+        print(f'{name:<28} import_ms={rs["import_ms"]:<10} modules={rs["modules"]}')
+        if heavy:
+            errors.append(f'{name}: `{stmt}` loads {", ".join(heavy)}')
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+    if args.update_baseline:
+        baseline.update(results)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f'baseline updated: {args.baseline}')
+    else:
+        for name, rs in results.items():
+            base = baseline.get(name)
+            if base and rs['import_ms'] > base['import_ms'] * (1 + args.tolerance) + 5:
+                errors.append(f'{name}: import_ms {rs["import_ms"]} > {base["import_ms"]} (+{args.tolerance:.0%})')
+    for e in errors:
+        print(f'REGRESSION {e}')
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,274 @@
+"""
+perf_appium 基准测试：在本地模拟的 Appium 服务（独立进程）及模拟的 AdbProxy 上运行常用流程，
+统计每个场景的往返次数、耗时及 Python 内存峰值，并与 baseline.json 比较，出现退化时以非 0 退出码结束。
+
+    python -m benchmark.run                     # 与基线比较
+    python -m benchmark.run --update-baseline   # 更新基线
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import tracemalloc
+import subprocess
+import urllib.request
+from typing import Callable, Dict, List
+
+from perf_appium.appium_device import AppiumDevice
+from perf_appium.appium_adb import AppiumAdb
+from perf_appium.android_ui import AndroidBaseUI
+
+from .fake_adb import FakeAdbProxy
+from .fake_appium import APP_ID
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+
+class BenchUI(AndroidBaseUI):
+
+    def permission_device_info(self) -> bool:
+        return False
+
+    def permission_screen_record(self) -> bool:
+        return False
+
+    def permission_require(self) -> bool:
+        return False
+
+    def permission_storage(self) -> bool:
+        return False
+
+    def permission_phone(self) -> bool:
+        return False
+
+    def permission_location(self) -> bool:
+        return False
+
+    def close_all_app(self) -> bool:
+        return False
+
+    def upgrade_app(self, pkg: str) -> bool:
+        return False
+
+    def get_main_container(self):
+        return None
+
+
+class FakeServerProcess:
+    # 在独立进程中运行模拟服务，避免其内存分配计入基准结果
+
+    def __init__(self, latency: float, nodes: int):
+        self.proc = subprocess.Popen(
+            [sys.executable, '-m', 'benchmark.fake_appium', '--latency', str(latency), '--nodes', str(nodes)],
+            stdout=subprocess.PIPE, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        self.url = self.proc.stdout.readline().decode().strip()
+        if not self.url:
+            raise RuntimeError('fake appium server failed to start')
+        self._base = self.url[:-len('/wd/hub')]
+
+    def _request(self, method: str, path: str):
+        req = urllib.request.Request(self._base + path, method=method, data=b'{}' if method == 'POST' else None,
+                                     headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(req) as r:
+            return json.loads(r.read())['value']
+
+    def stats(self) -> Dict[str, int]:
+        return self._request('GET', '/__stats')
+
+    def reset(self):
+        self._request('POST', '/__reset')
+
+    def close(self):
+        self.proc.terminate()
+        self.proc.wait()
+
+
+class Context:
+
+    def __init__(self, server: FakeServerProcess, tmp_dir: str):
+        self.server = server
+        self.tmp_dir = tmp_dir
+        self.dev = AppiumDevice.open_remote_driver(server.url, platformName='Android', udid='fake-device')
+        self.adb = FakeAdbProxy()
+        self.local_dev = AppiumDevice(self.dev.dev, local_locator=True)
+        self.ui = BenchUI(self.adb, self.local_dev)
+        self.appium_adb = AppiumAdb(self.dev)
+        self.big_file = os.path.join(tmp_dir, 'big.bin')
+        with open(self.big_file, 'wb') as f:
+            f.write(os.urandom(4 * 1024 * 1024))
+
+    def fresh(self):
+        # 每个场景开始前丢弃界面快照，保证从同一状态开始
+        self.dev.invalidate_page_source()
+        self.local_dev.invalidate_page_source()
+
+    def close(self):
+        self.dev.quit()
+
+
+def rid(i: int) -> str:
+    return f'{APP_ID}:id/item_{i}'
+
+
+def s_exist_same_screen(ctx: Context):
+    for i in range(5):
+        assert ctx.dev.exist(rid(i * 10))
+
+
+def s_exist_missing_timeout(ctx: Context):
+    assert not ctx.dev.exist(rid(99999), timeout=0.5)
+
+
+def s_click(ctx: Context):
+    for i in range(3):
+        ctx.dev.click(rid(i))
+
+
+def s_match_content(ctx: Context):
+    assert ctx.dev.match_content(rid(7), 'Item 7')
+
+
+def s_match_content_repeat(ctx: Context):
+    # 同一界面重复读取同一元素，元素句柄复用
+    for i in range(5):
+        assert ctx.dev.match_content(rid(7), 'Item 7')
+
+
+def s_find_elements_by_xpath(ctx: Context):
+    assert ctx.dev.find_elements_by_xpath('Item 1', key='text', is_contains=True)
+
+
+def s_local_click(ctx: Context):
+    for i in range(3):
+        ctx.ui.click(rid(i))
+
+
+def s_run_shell_x10(ctx: Context):
+    for i in range(10):
+        ctx.appium_adb.run_shell(f'echo {i}')
+
+
+def s_run_shells_x10(ctx: Context):
+    ctx.appium_adb.run_shells([f'echo {i}' for i in range(10)])
+
+
+def s_pull_file(ctx: Context):
+    ctx.appium_adb.pull_file(ctx.big_file, os.path.join(ctx.tmp_dir, 'pull.bin'))
+
+
+def s_pull_file_chunked(ctx: Context):
+    ctx.appium_adb.pull_file_chunked(ctx.big_file, os.path.join(ctx.tmp_dir, 'pull_chunked.bin'), resume=False)
+
+
+SCENARIOS = [
+    ('exist_same_screen_x5', s_exist_same_screen),
+    ('exist_missing_timeout', s_exist_missing_timeout),
+    ('click_x3', s_click),
+    ('match_content', s_match_content),
+    ('match_content_repeat_x5', s_match_content_repeat),
+    ('find_elements_by_xpath', s_find_elements_by_xpath),
+    ('local_click_x3', s_local_click),
+    ('run_shell_x10', s_run_shell_x10),
+    ('run_shells_x10', s_run_shells_x10),
+    ('pull_file_4mb', s_pull_file),
+    ('pull_file_chunked_4mb', s_pull_file_chunked),
+]  # type: List[Tuple[str, Callable[[Context], None]]]
+
+
+def measure(ctx: Context, fn: Callable[[Context], None], repeat: int) -> dict:
+    # 耗时取多次运行的中位数；内存峰值单独运行一次统计，避免 tracemalloc 的开销计入耗时
+    walls = []
+    round_trips = 0
+    for i in range(repeat):
+        ctx.fresh()
+        ctx.server.reset()
+        adb_calls = ctx.adb.round_trips
+        start = time.perf_counter()
+        fn(ctx)
+        walls.append(time.perf_counter() - start)
+        round_trips = sum(ctx.server.stats().values()) + ctx.adb.round_trips - adb_calls
+    ctx.fresh()
+    tracemalloc.start()
+    fn(ctx)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    walls.sort()
+    return {
+        'round_trips': round_trips,
+        'wall_ms': round(walls[len(walls) // 2] * 1000, 2),
+        'peak_kb': round(peak / 1024, 1),
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> List[str]:
+    """
+    与基线比较：往返次数不允许增加；耗时、内存允许 tolerance 比例的波动（另有少量绝对余量）
+    """
+    errors = []
+    for name, rs in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        if rs['round_trips'] > base['round_trips']:
+            errors.append(f'{name}: round_trips {rs["round_trips"]} > {base["round_trips"]}')
+        if rs['wall_ms'] > base['wall_ms'] * (1 + tolerance) + 20:
+            errors.append(f'{name}: wall_ms {rs["wall_ms"]} > {base["wall_ms"]} (+{tolerance:.0%})')
+        if rs['peak_kb'] > base['peak_kb'] * (1 + tolerance) + 256:
+            errors.append(f'{name}: peak_kb {rs["peak_kb"]} > {base["peak_kb"]} (+{tolerance:.0%})')
+    return errors
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='perf_appium benchmark')
+    parser.add_argument('--latency', type=float, default=0.005, help='模拟服务每个请求的延迟（秒）')
+    parser.add_argument('--nodes', type=int, default=500, help='page_source 列表节点数')
+    parser.add_argument('--repeat', type=int, default=3, help='每个场景重复次数，耗时取中位数')
+    parser.add_argument('--tolerance', type=float, default=0.5, help='耗时、内存允许的退化比例')
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--update-baseline', action='store_true')
+    parser.add_argument('-k', dest='only', help='只运行名称包含该关键字的场景')
+    args = parser.parse_args(argv)
+
+    server = FakeServerProcess(args.latency, args.nodes)
+    tmp_dir = tempfile.mkdtemp(prefix='perf_appium_bench_')
+    ctx = None
+    try:
+        ctx = Context(server, tmp_dir)
+        results = {}
+        for name, fn in SCENARIOS:
+            if args.only and args.only not in name:
+                continue
+            results[name] = rs = measure(ctx, fn, args.repeat)
+            print(f'{name:<28} round_trips={rs["round_trips"]:<5} wall_ms={rs["wall_ms"]:<10} peak_kb={rs["peak_kb"]}')
+    finally:
+        if ctx:
+            ctx.close()
+        server.close()
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding='utf-8') as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f'baseline updated: {args.baseline}')
+        return 0
+    if not os.path.exists(args.baseline):
+        print('no baseline, run with --update-baseline first')
+        return 0
+    with open(args.baseline, encoding='utf-8') as f:
+        errors = compare(results, json.load(f), args.tolerance)
+    for e in errors:
+        print(f'REGRESSION {e}')
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,6 +1,49 @@
+import sys
+import importlib
 
-from .perf_helper import AndroidPerfBaseHelper
-from .perf_helper import AndroidPerfBaseHelperWithWhistle
-from .ui_helper import AndroidBaseUI
+# 公开名称 -> 所在模块。首次访问时才导入对应模块，
+# 避免 `import perf_appium` 时即加载 appium、selenium、android_perf 等依赖
+_LAZY = {
+    'AndroidPerfBaseHelper': 'perf_helper',
+    'AndroidPerfBaseHelperWithWhistle': 'perf_helper',
+    'AndroidBaseUI': 'ui_helper',
+    'AppiumDevice': 'appium_device',
+    'AsyncAppiumDevice': 'async_device',
+    'AsyncBaseUI': 'async_ui',
+    'AppiumAdb': 'appium_adb',
+    'HybridAdb': 'hybrid_adb',
+    'DevicePool': 'device_pool',
+    'SessionPool': 'session_pool',
+    'InstallManager': 'install_manager',
+    'UIRecorder': 'replay',
+    'TraceReplayer': 'replay',
+    'SnapshotJournal': 'journal',
+    'JournalReader': 'journal',
+    'UITimeline': 'timeline',
+    'RetryPolicy': 'retry',
+    'Metrics': 'metrics',
+    'AndroidResourceBase': 'resource',
+    'get_android_id': 'resource',
+    'mk_xpath': 'local_locator',
+}
 
+__all__ = list(_LAZY)
 
+
+def __getattr__(name: str):
+    mod = _LAZY.get(name)
+    if mod is None:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    v = getattr(importlib.import_module(f'.{mod}', __name__), name)
+    globals()[name] = v
+    return v
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
+
+
+if sys.version_info < (3, 7):
+    # 不支持模块级 __getattr__，直接导入
+    for _name in __all__:
+        __getattr__(_name)
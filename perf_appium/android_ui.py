@@ -4,7 +4,10 @@ from android_perf.base_adb import AdbProxy
 
 from .ui import BaseUI
 from .log import default as log
+from .metrics import SLEEP
 from .appium_device import AppiumDevice
+from .device_profile import DeviceProfile, DeviceProfileCache, get_device_profile
+from .install_manager import InstallManager
 
 
 class DeviceOsOperation(metaclass=abc.ABCMeta):
@@ -48,9 +51,11 @@ class DeviceOsOperation(metaclass=abc.ABCMeta):
 
 
 class AndroidBaseUI(BaseUI, DeviceOsOperation, metaclass=abc.ABCMeta):
+    # 设备档案缓存，None 时使用默认缓存
+    profile_cache: DeviceProfileCache = None
 
-    @staticmethod
-    def open_android_driver_by_adb(adb: AdbProxy, appium_server_url: str = None, **cfg) -> AppiumDevice:
+    @classmethod
+    def open_android_driver_by_adb(cls, adb: AdbProxy, appium_server_url: str = None, **cfg) -> AppiumDevice:
         """
         启动 Appium 客户端
         :param adb:
@@ -59,12 +64,15 @@ class AndroidBaseUI(BaseUI, DeviceOsOperation, metaclass=abc.ABCMeta):
             appPackage: 需启动的 app 包名
             appActivity: app 启动的主 Activity
             noReset: bool，是否保留 session 信息，默认 True 可以避免重新登录
+            AppiumDevice.open_remote_driver 的选项（session_pool、page_source_ttl、local_locator、retry、metrics、timeline）
+            同样通过 cfg 传入，不会作为 Appium 配置发送
         :return:
         """
+        profile = get_device_profile(adb, cache=cls.profile_cache)
         config = {
             "platformName": "Android",  # 操作系统
-            "udid": adb.get_device_serial(),  # 设备 ID
-            "platformVersion": adb.get_device_info().os_version,  # 设备版本号
+            "udid": profile.serial,  # 设备 ID
+            "platformVersion": profile.os_version,  # 设备版本号
             # 'noReset': True
         }
         config.update(cfg)
@@ -72,6 +80,9 @@ class AndroidBaseUI(BaseUI, DeviceOsOperation, metaclass=abc.ABCMeta):
 
     @staticmethod
     def open_android_driver(serial: str = None, appium_server_url: str = None, **cfg) -> AppiumDevice:
+        """
+        启动 Appium 客户端，参数同 open_android_driver_by_adb
+        """
         config = {
             "platformName": "Android",  # 操作系统
             "udid": serial,  # 设备 ID
@@ -85,40 +96,87 @@ class AndroidBaseUI(BaseUI, DeviceOsOperation, metaclass=abc.ABCMeta):
             dev = self.open_android_driver_by_adb(adb)
         super().__init__(dev)
         self.adb = adb
-        self.device_info = self.adb.get_device_info()
-        res = self.get_device_resolution()
-        self.screen_width = res[0]
-        self.screen_height = res[1]
+        if dev.tap_handler is None:
+            # 本地定位到的元素直接通过 adb 按坐标点击
+            dev.tap_handler = self._adb_tap
+        self._device_info = None
+        self.profile: DeviceProfile = get_device_profile(adb, cache=self.profile_cache)
+        self.screen_width, self.screen_height = self.get_device_resolution()
+
+    @property
+    def device_info(self):
+        # 完整的设备信息，首次访问时才通过 adb 读取；系统版本、品牌、分辨率请直接使用 profile
+        if self._device_info is None:
+            self._device_info = self.adb.get_device_info()
+        return self._device_info
+
+    @device_info.setter
+    def device_info(self, v):
+        self._device_info = v
 
     def close(self):
         self.quit()
         self.adb.close()
 
+    def _adb_tap(self, x: int, y: int):
+        return self.adb.run_shell(f'input tap {x} {y}')
+
     def home(self):
-        self.adb.home()
+        with self.dev.timeline.span('home'):
+            self.adb.home()
+        self.dev.invalidate_page_source()
 
     def go_back(self):
-        self.adb.go_back()
+        with self.dev.timeline.span('go_back'):
+            self.adb.go_back()
+        self.dev.invalidate_page_source()
 
     def task_manager(self):
-        self.adb.task_manager()
+        with self.dev.timeline.span('task_manager'):
+            self.adb.task_manager()
+        self.dev.invalidate_page_source()
 
     def input(self, value: str):
         # 向界面元素对象输入文本，前提是必须先对对象执行click事件
-        return self.adb.input(value)
+        try:
+            with self.dev.timeline.span('input'):
+                return self.adb.input(value)
+        finally:
+            self.dev.invalidate_page_source()
 
     def get_device_resolution(self) -> (int, int):
-        return self.adb.get_device_resolution()
+        # 分辨率已在设备档案中缓存，无需再通过 adb 读取
+        return self.profile.resolution
+
+    def get_screen_size(self) -> (int, int):
+        return self.screen_width, self.screen_height
+
+    def get_focused_window(self) -> str:
+        # 当前获得焦点的窗口及应用，用于判断界面是否切换完成
+        return self.adb.run_shell('dumpsys window | grep -E "mCurrentFocus|mFocusedApp"').strip()
+
+    def wait_until_idle(self, quiet: float = 0.5, timeout: float = 5.0, by_window=False):
+        """
+        等待界面稳定，参数同 AppiumDevice.wait_until_idle
+        :param by_window: 为真时只通过 adb 判断焦点窗口是否稳定，不获取界面结构，适用于应用切换、返回桌面等场景
+        """
+        if not by_window:
+            return self.dev.wait_until_idle(quiet, timeout)
+        rs = self.dev.waiter.wait_stable(self.get_focused_window, quiet, timeout, 'idle window', 0.2)
+        if rs.slept:
+            self.dev.metrics.observe(SLEEP, 'wait_idle', rs.slept)
+        self.dev.invalidate_page_source()
+        return rs
 
     def open_app_market(self, pkg: str):
-        return self.adb.run_shell(f'am start -d market://details?id={pkg}')
+        try:
+            return self.adb.run_shell(f'am start -d market://details?id={pkg}')
+        finally:
+            self.dev.invalidate_page_source()
 
     @property
     def device_brand(self):
-        k = '_device_brand'
-        if not hasattr(self, k):
-            setattr(self, k, self.device_info.brand.lower())
-        return getattr(self, k)
+        return self.profile.brand.lower()
 
     def clear_app(self, pkg: str):
         """清理App所有数据，需要到开发者选项中开启’禁止权限监控‘"""
@@ -130,10 +188,14 @@ class AndroidBaseUI(BaseUI, DeviceOsOperation, metaclass=abc.ABCMeta):
             raise Exception(f'清理 App 失败: {e}\n请尝试到开发者选项中开启’禁止权限监控‘！')
 
     def launch_app(self, pkg: str, activity: str = None):
-        self.adb.launch_app(pkg, activity)
+        with self.dev.timeline.span('launch_app', pkg):
+            self.adb.launch_app(pkg, activity)
+        self.dev.invalidate_page_source()
 
     def kill_app(self, pkg: str):
-        self.adb.kill_app(pkg)
+        with self.dev.timeline.span('kill_app', pkg):
+            self.adb.kill_app(pkg)
+        self.dev.invalidate_page_source()
 
     def remove_app(self, pkg: str):
         try:
@@ -145,5 +207,14 @@ class AndroidBaseUI(BaseUI, DeviceOsOperation, metaclass=abc.ABCMeta):
         """直接执行安装过程，安装过程会卡住主进程，不同设备可能会有界面操作上的问题"""
         return self.adb.install_app(file_path)
 
+    def ensure_app(self, file_path: str, force=False):
+        """
+        设备上未安装相同版本（及相同构建）的 APK 时才安装
+        :param file_path: APK 文件路径
+        :param force: 是否强制安装
+        :return: InstallResult
+        """
+        return InstallManager().install_one(self.adb, file_path, force, installer=self.install_app)
+
     def exists_app(self, pkg: str) -> str:
         return self.adb.get_app_version(pkg)
@@ -0,0 +1,150 @@
+import os
+import re
+import struct
+import shutil
+import hashlib
+import zipfile
+import threading
+import subprocess
+from typing import Dict, List, Optional
+
+# 二进制 AndroidManifest.xml 中的块类型
+_RES_STRING_POOL_TYPE = 0x0001
+_RES_XML_RESOURCE_MAP_TYPE = 0x0180
+_RES_XML_START_ELEMENT_TYPE = 0x0102
+_UTF8_FLAG = 0x100
+_TYPE_STRING = 0x03
+
+# 属性名被混淆时按资源 id 识别
+_ATTR_IDS = {0x0101021b: 'versionCode', 0x0101021c: 'versionName'}
+
+
+class ApkInfo:
+    __slots__ = ('path', 'sha256', 'size', 'package', 'version_code', 'version_name')
+
+    def __init__(self, path: str, sha256: str, size: int, package: str, version_code: Optional[int],
+                 version_name: Optional[str]):
+        self.path = path
+        self.sha256 = sha256
+        self.size = size
+        self.package = package
+        self.version_code = version_code
+        self.version_name = version_name
+
+    def __repr__(self):
+        return f'<ApkInfo {self.package} {self.version_name}({self.version_code}) {self.sha256[:12]}>'
+
+
+def file_sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for b in iter(lambda: f.read(chunk_size), b''):
+            h.update(b)
+    return h.hexdigest()
+
+
+def _read_string_pool(data: bytes, offset: int) -> List[str]:
+    header_size, = struct.unpack_from('<H', data, offset + 2)
+    count, _, flags, strings_start = struct.unpack_from('<IIII', data, offset + 8)
+    utf8 = flags & _UTF8_FLAG
+    base = offset + strings_start
+    rs = []
+    for i in range(count):
+        p = base + struct.unpack_from('<I', data, offset + header_size + i * 4)[0]
+        if utf8:
+            # 字符数、字节数各占 1~2 字节
+            p += 2 if data[p] & 0x80 else 1
+            n = data[p]
+            if n & 0x80:
+                n = ((n & 0x7f) << 8) | data[p + 1]
+                p += 1
+            p += 1
+            rs.append(data[p:p + n].decode('utf-8', 'replace'))
+        else:
+            n, = struct.unpack_from('<H', data, p)
+            p += 2
+            if n & 0x8000:
+                n = ((n & 0x7fff) << 16) | struct.unpack_from('<H', data, p)[0]
+                p += 2
+            rs.append(data[p:p + n * 2].decode('utf-16-le', 'replace'))
+    return rs
+
+
+def parse_manifest(data: bytes) -> Dict[str, str]:
+    """
+    解析二进制 AndroidManifest.xml，只读取 <manifest> 元素的属性
+    :return: {属性名: 值}，如 package、versionCode、versionName
+    """
+    strings = []  # type: List[str]
+    res_ids = []  # type: List[int]
+    offset = struct.unpack_from('<H', data, 2)[0]
+    while offset + 8 <= len(data):
+        chunk_type, header_size, size = struct.unpack_from('<HHI', data, offset)
+        if size <= 0:
+            break
+        if chunk_type == _RES_STRING_POOL_TYPE:
+            strings = _read_string_pool(data, offset)
+        elif chunk_type == _RES_XML_RESOURCE_MAP_TYPE:
+            res_ids = list(struct.unpack_from(f'<{(size - header_size) // 4}I', data, offset + header_size))
+        elif chunk_type == _RES_XML_START_ELEMENT_TYPE:
+            ext = offset + header_size
+            _, name, attr_start, attr_size, attr_count = struct.unpack_from('<IIHHH', data, ext)
+            if strings[name] != 'manifest':
+                break
+            rs = {}
+            for i in range(attr_count):
+                a = ext + attr_start + i * attr_size
+                _, a_name, raw, _, _, data_type, value = struct.unpack_from('<IIIHBBI', data, a)
+                key = strings[a_name] if a_name < len(strings) else ''
+                if not key and a_name < len(res_ids):
+                    key = _ATTR_IDS.get(res_ids[a_name], '')
+                if raw != 0xffffffff:
+                    rs[key] = strings[raw]
+                elif data_type == _TYPE_STRING:
+                    rs[key] = strings[value]
+                else:
+                    rs[key] = str(value)
+            return rs
+        offset += size
+    raise ValueError('manifest element not found')
+
+
+def _aapt_badging(path: str) -> Dict[str, str]:
+    aapt = shutil.which('aapt') or shutil.which('aapt2')
+    if not aapt:
+        raise ValueError('aapt not found')
+    out = subprocess.run([aapt, 'dump', 'badging', path], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                         check=True).stdout.decode('utf-8', 'replace')
+    m = re.search(r"package: name='([^']*)' versionCode='([^']*)' versionName='([^']*)'", out)
+    if not m:
+        raise ValueError('unexpected aapt output')
+    return {'package': m.group(1), 'versionCode': m.group(2), 'versionName': m.group(3)}
+
+
+_cache = {}  # type: Dict[Tuple[str, float, int], ApkInfo]
+_cache_lock = threading.Lock()
+
+
+def get_apk_info(path: str) -> ApkInfo:
+    """
+    读取 APK 的包名、版本及文件哈希，同一文件（路径、修改时间、大小不变）只读取一次。
+    优先直接解析 AndroidManifest.xml，失败时使用 aapt
+    """
+    path = os.path.abspath(path)
+    st = os.stat(path)
+    k = (path, st.st_mtime, st.st_size)
+    with _cache_lock:
+        rs = _cache.get(k)
+    if rs:
+        return rs
+    try:
+        with zipfile.ZipFile(path) as z:
+            attrs = parse_manifest(z.read('AndroidManifest.xml'))
+    except (KeyError, ValueError, IndexError, struct.error, zipfile.BadZipFile):
+        attrs = _aapt_badging(path)
+    code = attrs.get('versionCode')
+    rs = ApkInfo(path, file_sha256(path), st.st_size, attrs['package'],
+                 int(code) if code and code.isdigit() else None, attrs.get('versionName'))
+    with _cache_lock:
+        _cache[k] = rs
+    return rs
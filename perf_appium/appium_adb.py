@@ -1,41 +1,145 @@
+import os
+import re
+import time
+import shlex
 import types
+import uuid
 import base64
+import hashlib
+from collections import namedtuple
 from http.client import RemoteDisconnected
+from typing import List
 
 from selenium.common.exceptions import WebDriverException
 
 from android_perf.base_adb import AdbInterface
 
 from .appium_device import AppiumDevice
+from .metrics import ADB
 from .log import default as log
 
+# 批量执行 shell 的单条结果，exit_code 为 None 表示未能执行（如请求失败）
+ShellResult = namedtuple('ShellResult', ['cmd', 'output', 'exit_code'])
+
 
 class AppiumAdb(AdbInterface):
     # 通过Appium 服务（http方式）执行adb 指令，经实测，效率很差，对实时性要求高的不建议用
+    # 多条指令请尽量使用 run_shells 合并为一次请求
+
+    SHELL_TIMEOUT = 5000
+    # 分块传输文件时每块的字节数
+    CHUNK_SIZE = 512 * 1024
+    # 分块传输单块请求的超时毫秒数
+    CHUNK_TIMEOUT = 30000
+    # stream_shell 在设备上保存输出的目录，及每次轮询最多读取的字节数
+    STREAM_DIR = '/data/local/tmp'
+    STREAM_READ_SIZE = 64 * 1024
 
     def __init__(self, dev: AppiumDevice):
         self.dev = dev
 
-    def run_shell(self, cmd: str, clean_wrap=False) -> str:
-        try:
-            rs = self.dev.execute_script('mobile: shell', {
+    def _mobile_shell(self, cmd: str, timeout: int = None) -> dict:
+        # 直接调用 webdriver，耗时只计入 adb 分类
+        with self.dev.metrics.timed(ADB, 'mobile_shell'):
+            return self.dev.dev.execute_script('mobile: shell', {
                 'command': cmd,
                 # 'args': [''],
                 'includeStderr': True,
-                'timeout': 5000
+                'timeout': timeout or self.SHELL_TIMEOUT
             })
-            out = rs['stdout'] or rs['stderr']
-            if clean_wrap:
-                return out.strip()
-            return out
+
+    def _retry_mobile_shell(self, cmd: str, timeout: int = None) -> dict:
+        # 连接被断开时按设备的重试策略重试
+        return self.dev.retry.call(lambda: self._mobile_shell(cmd, timeout), (RemoteDisconnected,), 'run_shell')
+
+    def run_shell(self, cmd: str, clean_wrap=False) -> str:
+        try:
+            return self.run_shell_or_raise(cmd, clean_wrap)
         except WebDriverException as e:
             return str(e)
-        except RemoteDisconnected as e:
-            log.warning(f'Appium请求失败 {e}，重试...')
-            return self.run_shell(cmd, clean_wrap)
 
-    def stream_shell(self, cmd: str) -> types.GeneratorType:
-        raise NotImplementedError('Appium-adb not support for `stream shell`')
+    def run_shell_or_raise(self, cmd: str, clean_wrap=False) -> str:
+        # 同 run_shell，但请求失败时抛出 WebDriverException，而不是把错误信息当作输出返回
+        rs = self._retry_mobile_shell(cmd)
+        out = rs['stdout'] or rs['stderr']
+        if clean_wrap:
+            return out.strip()
+        return out
+
+    def run_shells(self, cmds: List[str], clean_wrap=False, timeout: int = None) -> List[ShellResult]:
+        """
+        将多条指令合并为一次 `mobile: shell` 请求执行，再按分隔标记拆分出每条指令的输出及退出码
+        :param cmds: 指令列表，按顺序执行，前面的指令失败不影响后续指令
+        :param clean_wrap: 是否去掉输出首尾空白
+        :param timeout: 整批指令的超时毫秒数，默认 SHELL_TIMEOUT
+        :return: 与 cmds 一一对应的 ShellResult 列表
+        """
+        if not cmds:
+            return []
+        token = f'__perf_appium_{uuid.uuid4().hex}'
+        script = ' ; '.join(
+            f"echo {token}:B:{i} ; ( {cmd} ) 2>&1 ; printf '\\n{token}:E:{i}:%s\\n' $?"
+            for i, cmd in enumerate(cmds))
+        try:
+            rs = self._retry_mobile_shell(script, timeout)
+        except WebDriverException as e:
+            return [ShellResult(cmd, str(e), None) for cmd in cmds]
+        out = (rs['stdout'] or '') + (rs['stderr'] or '')
+        found = {}
+        for m in re.finditer(rf'{token}:B:(\d+)\r?\n(.*?)\r?\n{token}:E:\1:(\d+)', out, re.S):
+            found[int(m.group(1))] = (m.group(2), int(m.group(3)))
+        results = []
+        for i, cmd in enumerate(cmds):
+            o, code = found.get(i, ('', None))
+            results.append(ShellResult(cmd, o.strip() if clean_wrap else o, code))
+        return results
+
+    def stream_shell(self, cmd: str, interval: float = 0.1, max_interval: float = 2.0) -> types.GeneratorType:
+        """
+        流式执行指令，逐行返回输出（不含换行符）。
+        指令在设备后台执行并将输出写入临时文件，之后按字节偏移增量读取：有新输出时按 interval 轮询，无输出时间隔逐步加大到 max_interval。
+        指令结束且输出读取完毕后生成器结束；提前关闭生成器时会结束设备上的进程并清理临时文件。
+        :param cmd: 指令
+        :param interval: 最小轮询间隔（秒）
+        :param max_interval: 最大轮询间隔（秒）
+        :return:
+        """
+        out_file = shlex.quote(f'{self.STREAM_DIR}/perf_appium_stream_{uuid.uuid4().hex}.log')
+        rs = self._mobile_shell(f'nohup sh -c {shlex.quote(cmd)} > {out_file} 2>&1 < /dev/null & echo $!')
+        pid = (rs['stdout'] or '').strip()
+        if not pid.isdigit():
+            raise RuntimeError(f'stream shell 启动失败：{rs["stderr"] or pid}')
+        offset = 0
+        delay = interval
+        buf = b''
+        try:
+            while True:
+                # 先判断进程是否结束再读取，保证结束前写入的输出都能读到
+                alive, data = self.run_shells([
+                    f'kill -0 {pid} 2>/dev/null && echo 1 || echo 0',
+                    f'tail -c +{offset + 1} {out_file} | head -c {self.STREAM_READ_SIZE} | base64',
+                ], clean_wrap=True)
+                if alive.exit_code is None:
+                    raise IOError(f'stream shell 读取输出失败：{alive.output}')
+                data = base64.b64decode(data.output)
+                offset += len(data)
+                if data:
+                    lines = (buf + data).split(b'\n')
+                    buf = lines.pop()
+                    for line in lines:
+                        yield line.rstrip(b'\r').decode('utf-8', 'replace')
+                    delay = interval
+                    if len(data) >= self.STREAM_READ_SIZE:
+                        continue
+                elif alive.output != '1':
+                    break
+                else:
+                    delay = min(delay * 2, max_interval)
+                time.sleep(delay)
+            if buf:
+                yield buf.rstrip(b'\r').decode('utf-8', 'replace')
+        finally:
+            self._mobile_shell(f'kill {pid} 2>/dev/null ; rm -f {out_file}')
 
     def close(self):
         self.dev.quit()
@@ -46,16 +150,136 @@ class AppiumAdb(AdbInterface):
     def uninstall_app(self, app_bundle: str):
         return self.dev.remove_app(app_bundle)
 
-    def push_file(self, local_path: str, device_path: str):
+    def push_file(self, local_path: str, device_path: str, chunk_size: int = None):
+        """
+        :param local_path:
+        :param device_path:
+        :param chunk_size: 指定则分块上传，详见 push_file_chunked
+        :return:
+        """
+        if chunk_size:
+            return self.push_file_chunked(local_path, device_path, chunk_size)
         return self.dev.push_file(device_path, source_path=local_path)
 
-    def pull_file(self, device_path: str, local_path: str):
+    def pull_file(self, device_path: str, local_path: str, chunk_size: int = None):
+        """
+        :param device_path:
+        :param local_path:
+        :param chunk_size: 指定则分块下载，详见 pull_file_chunked
+        :return:
+        """
+        if chunk_size:
+            return self.pull_file_chunked(device_path, local_path, chunk_size)
         ct_b64 = self.dev.pull_file(device_path)
         rs = base64.b64decode(ct_b64)
         with open(local_path, 'wb') as f:
             f.write(rs)
         return local_path
 
+    def get_remote_file_size(self, device_path: str) -> int:
+        # 文件不存在时 stat 退出码非零，Appium 会抛出异常，因此改为输出 -1
+        rs = self._mobile_shell(f'stat -c %s {shlex.quote(device_path)} 2>/dev/null || echo -1')
+        out = (rs['stdout'] or '').strip()
+        if not out.isdigit():
+            raise FileNotFoundError(f'{device_path}: {out if out != "-1" else "No such file"}')
+        return int(out)
+
+    def _read_remote_chunk(self, device_path: str, index: int, chunk_size: int) -> bytes:
+        rs = self._mobile_shell(
+            f'dd if={shlex.quote(device_path)} bs={chunk_size} skip={index} count=1 2>/dev/null | base64',
+            self.CHUNK_TIMEOUT)
+        return base64.b64decode(rs['stdout'] or '')
+
+    @staticmethod
+    def _local_prefix_md5(path: str, size: int) -> str:
+        h = hashlib.md5()
+        with open(path, 'rb') as f:
+            while size > 0:
+                b = f.read(min(size, 1024 * 1024))
+                if not b:
+                    break
+                h.update(b)
+                size -= len(b)
+        return h.hexdigest()
+
+    def _remote_prefix_md5(self, device_path: str, size: int) -> str:
+        rs = self._mobile_shell(f'head -c {size} {shlex.quote(device_path)} | md5sum', self.CHUNK_TIMEOUT)
+        return (rs['stdout'] or '').strip().split(' ')[0]
+
+    def _check_resume(self, local_path: str, device_path: str, start: int, chunk_size: int) -> int:
+        # 续传前比较两端已有部分的 md5，不一致（如目标是旧文件）则从头传输
+        if not start:
+            return 0
+        size = start * chunk_size
+        if self._local_prefix_md5(local_path, size) == self._remote_prefix_md5(device_path, size):
+            return start
+        log.warning(f'续传校验失败：{local_path} 与 {device_path} 的前 {size} 字节不一致，重新传输')
+        return 0
+
+    def pull_file_chunked(self, device_path: str, local_path: str, chunk_size: int = None, resume=False) -> str:
+        """
+        分块下载文件：每次只读取设备文件的一段，解码后立即写入本地，内存占用与文件大小无关
+        :param device_path:
+        :param local_path:
+        :param chunk_size: 每块字节数，默认 CHUNK_SIZE。续传时须与上次一致
+        :param resume: 本地文件已存在时，是否从最后一个完整的块继续下载，续传前会校验已下载部分与设备文件一致
+        :return: local_path
+        """
+        chunk_size = chunk_size or self.CHUNK_SIZE
+        total = self.get_remote_file_size(device_path)
+        count = (total + chunk_size - 1) // chunk_size
+        start = 0
+        if resume and os.path.exists(local_path):
+            start = min(os.path.getsize(local_path) // chunk_size, count)
+            start = self._check_resume(local_path, device_path, start, chunk_size)
+        with open(local_path, 'r+b' if start else 'wb') as f:
+            f.seek(start * chunk_size)
+            f.truncate()
+            for i in range(start, count):
+                data = self._read_remote_chunk(device_path, i, chunk_size)
+                expect = min(chunk_size, total - i * chunk_size)
+                if len(data) != expect:
+                    raise IOError(f'下载 {device_path} 第 {i} 块不完整：{len(data)}/{expect}，可稍后续传')
+                f.write(data)
+                f.flush()
+        if start:
+            log.info(f'{device_path} 从第 {start}/{count} 块续传完成')
+        return local_path
+
+    def push_file_chunked(self, local_path: str, device_path: str, chunk_size: int = None, resume=False):
+        """
+        分块上传文件：每次只读取本地文件的一段，上传到设备临时文件后追加到目标文件，内存占用与文件大小无关
+        :param local_path:
+        :param device_path:
+        :param chunk_size: 每块字节数，默认 CHUNK_SIZE。续传时须与上次一致
+        :param resume: 设备上目标文件已存在时，是否从最后一个完整的块继续上传，续传前会校验已上传部分与本地文件一致
+        :return: device_path
+        """
+        chunk_size = chunk_size or self.CHUNK_SIZE
+        total = os.path.getsize(local_path)
+        start = 0
+        if resume:
+            try:
+                start = min(self.get_remote_file_size(device_path), total) // chunk_size
+            except FileNotFoundError:
+                pass
+            start = self._check_resume(local_path, device_path, start, chunk_size)
+        dst = shlex.quote(device_path)
+        part = f'{device_path}.part'
+        self._mobile_shell(f'truncate -s {start * chunk_size} {dst}')
+        with open(local_path, 'rb') as f:
+            f.seek(start * chunk_size)
+            while True:
+                data = f.read(chunk_size)
+                if not data:
+                    break
+                self.dev.push_file(part, base64.b64encode(data).decode())
+                rs = self._mobile_shell(f'cat {shlex.quote(part)} >> {dst} && rm {shlex.quote(part)} && echo ok',
+                                        self.CHUNK_TIMEOUT)
+                if (rs['stdout'] or '').strip() != 'ok':
+                    raise IOError(f'上传 {device_path} 失败：{rs["stderr"] or rs["stdout"]}')
+        return device_path
+
     def get_device_serial(self) -> str:
         return self.dev.get_device_name()
 
@@ -1,13 +1,24 @@
-import time
-from typing import Union, List, Any, Optional
+from typing import Union, List, Any, Optional, Tuple, Sequence
+import zlib
 import threading
+from xml.etree.ElementTree import ParseError
 
 from appium import webdriver
 from appium.webdriver.common.appiumby import AppiumBy
 from appium.webdriver.webelement import WebElement
-from selenium.common.exceptions import WebDriverException, NoSuchElementException
+from selenium.webdriver.remote.command import Command
+from selenium.common.exceptions import WebDriverException, NoSuchElementException, StaleElementReferenceException
 
 from .log import default as log
+from .snapshot import PageSnapshot
+from .wait import Waiter, WaitResult
+from .session_pool import SessionPool
+from .retry import RetryPolicy, CircuitOpenError
+from .metrics import Metrics, APPIUM, SLEEP
+from .local_locator import LocalHierarchy, LocalElement, mk_xpath
+from .element_cache import ElementCache
+from .journal import SnapshotJournal
+from .timeline import UITimeline
 
 
 class ElementNotFoundError(Exception):
@@ -25,28 +36,70 @@ class AppiumReconnectError(Exception):
 class AppiumDevice:
     # 简单封装 appium webdriver.Remote.集中管理设备连接状态，防止在出现需要重连时，多个引用的状态无法同步的问题
     @classmethod
-    def open_remote_driver(cls, appium_server_url: str = None, **cfg):
+    def open_remote_driver(cls, appium_server_url: str = None, session_pool: SessionPool = None,
+                           page_source_ttl: Optional[float] = 1.0, local_locator=False, retry: RetryPolicy = None,
+                           metrics: Metrics = None, timeline: UITimeline = None, **cfg):
         """
         启动 Appium 客户端的封装
         :param appium_server_url: Appium服务端地址
+        :param session_pool: 会话池，指定则优先复用池中同配置的空闲会话
+        :param page_source_ttl: 同 __init__
+        :param local_locator: 同 __init__
+        :param retry: 同 __init__
+        :param metrics: 同 __init__
+        :param timeline: 同 __init__
         :param cfg: 键值对配置项，参数健值请参考appium客户端配置，
         :return: AppiumDevice
         """
-        return AppiumDevice(cls._open_remote_driver(appium_server_url, **cfg))
+        return cls(cls._open_remote_driver(appium_server_url, session_pool, **cfg), page_source_ttl=page_source_ttl,
+                   local_locator=local_locator, session_pool=session_pool, retry=retry, metrics=metrics,
+                   timeline=timeline)
 
     @staticmethod
-    def _open_remote_driver(appium_server_url: str = None, **cfg) -> webdriver.Remote:
+    def _open_remote_driver(appium_server_url: str = None, session_pool: SessionPool = None, **cfg) -> webdriver.Remote:
         """
         启动 Appium 客户端
         :param appium_server_url: Appium服务端地址
+        :param session_pool: 会话池
         :param cfg: 键值对配置项，参数健值请参考appium客户端配置，
         :return: webdriver.Remote
         """
+        if session_pool:
+            return session_pool.acquire(appium_server_url, cfg)
         return webdriver.Remote(appium_server_url or 'http://localhost:4723/wd/hub', cfg)
 
-    def __init__(self, dev: webdriver.Remote):
+    def __init__(self, dev: webdriver.Remote, page_source_ttl: Optional[float] = 1.0, local_locator=False,
+                 session_pool: SessionPool = None, retry: RetryPolicy = None, metrics: Metrics = None,
+                 timeline: UITimeline = None):
+        """
+        :param dev:
+        :param page_source_ttl: page_source 快照有效秒数，详见 PageSnapshot
+        :param local_locator: 是否在本地解析界面结构来查找元素（ID 及 mk_xpath 形式的 xpath），
+            查找结果为 LocalElement，点击时直接按坐标执行
+        :param session_pool: 会话池，指定则 quit 时归还会话，重连时优先重新绑定原会话
+        :param retry: 获取界面、重连等操作的重试策略，默认 RetryPolicy()
+        :param metrics: 各往返操作的耗时统计，默认 Metrics()，只在内存中汇总
+        :param timeline: 界面操作时间线，默认 UITimeline()
+        """
         self._dev = dev
+        self.session_pool = session_pool
+        self.retry = retry or RetryPolicy()
+        self.metrics = metrics or Metrics()
+        # UITimeline 定义了 __len__，为空时为假值，不能用 or 判断
+        self.timeline = timeline if timeline is not None else UITimeline()
         self._dev_lock = threading.Lock()
+        self.snapshot = PageSnapshot(page_source_ttl)
+        self.local_locator = local_locator
+        self.tap_handler = None
+        self._hierarchy = None
+        self.waiter = Waiter()
+        # 界面代数，每次可能改变界面的操作后递增，用于元素句柄缓存
+        self.generation = 0
+        self.element_cache = ElementCache()
+        self.journal = None  # type: Optional[SnapshotJournal]
+        self._lookup = ''
+        # 最近一次重新绑定的会话，重新绑定后仍然失败则不再绑定，改为新建会话
+        self._reattached_session = None
         self.config = dev.capabilities['desired']
         self.appium_server_url = dev.command_executor._url
         log.debug(
@@ -66,138 +119,444 @@ class AppiumDevice:
 
     def _reconnect_device(self):
         with self._dev_lock:
-            self._dev = self._open_remote_driver(self.appium_server_url, **self.config)
+            self._dev = self._open_remote_driver(self.appium_server_url, self.session_pool, **self.config)
+
+    def _reattach_device(self) -> bool:
+        # 会话池模式下，优先重新绑定服务端仍存活的原会话；失败则丢弃原会话
+        with self._dev_lock:
+            old = self._dev
+        if old is None:
+            return False
+        dev = None
+        if old.session_id != self._reattached_session:
+            dev = self.session_pool.reattach(self.appium_server_url, old.session_id, old.caps)
+        if dev is None:
+            self._reattached_session = None
+            self.session_pool.discard(old)
+            self._set_device(None)
+            return False
+        self._reattached_session = dev.session_id
+        self._set_device(dev)
+        return True
 
     def execute_script(self, script, *args):
-        return self.dev.execute_script(script, *args)
+        with self.metrics.timed(APPIUM, 'execute_script', script):
+            return self.dev.execute_script(script, *args)
 
     def install_app(self, app_path: str, **options: Any):
-        return self.dev.install_app(app_path, **options)
+        with self.metrics.timed(APPIUM, 'install_app'):
+            return self.dev.install_app(app_path, **options)
 
     def remove_app(self, app_id: str, **options: Any):
-        return self.dev.remove_app(app_id, **options)
+        with self.metrics.timed(APPIUM, 'remove_app'):
+            return self.dev.remove_app(app_id, **options)
 
     def push_file(self, destination_path: str, base64data: Optional[str] = None, source_path: Optional[str] = None):
-        return self.dev.push_file(destination_path, base64data, source_path)
+        with self.metrics.timed(APPIUM, 'push_file'):
+            return self.dev.push_file(destination_path, base64data, source_path)
 
     def pull_file(self, path: str):
-        return self.dev.pull_file(path)
+        with self.metrics.timed(APPIUM, 'pull_file'):
+            return self.dev.pull_file(path)
 
     def get_device_name(self) -> str:
         return self.dev.capabilities['deviceName']
 
-    def check_exists(self, value: str) -> bool:
-        try:
+    def get_page_source(self, refresh=False) -> str:
+        """
+        获取界面结构，优先复用快照
+        :param refresh: 是否忽略快照，强制重新获取
+        :return:
+        """
+        if not refresh:
+            rs = self.snapshot.get()
+            if rs is not None:
+                return rs
+        with self.metrics.timed(APPIUM, 'page_source'):
             rs = self.dev.page_source
-            return value in rs
-        except WebDriverException as e:
-            log.warning(f'!!! Appium get page source failed!\n===========\n{e}\n============\nTrying again...')
-            self.reconnect()
-            return self.check_exists(value)
+        self._reattached_session = None
+        self.snapshot.update(rs)
+        if self.journal:
+            self.journal.record(rs, self._lookup)
+        return rs
 
-    @staticmethod
-    def mk_xpath(value: str, view_tag=None, key=None, is_contains=False) -> str:
+    def enable_journal(self, path: str, **kwargs) -> SnapshotJournal:
         """
-        构建xpath
-        :param value: 值
-        :param view_tag: 标签，默认*
-        :param key: text, content-desc, class. 默认：content-desc
-        :param is_contains: 是否模糊匹配，默认否
-        :return:
+        开启界面结构日志，之后每次从服务端获取的界面结构都会压缩后写入 path，写入在后台线程中进行
+        :param path: 日志文件，可通过 JournalReader 还原任一步骤的界面
+        :param kwargs: 其他 SnapshotJournal 参数
+        :return: SnapshotJournal
         """
-        view_tag = view_tag or '*'
-        key = key or "content-desc"
-        if is_contains:
-            return f'//{view_tag}[contains(@{key},"{value}")]'
-        return f'//{view_tag}[@{key}="{value}"]'
+        self.close_journal()
+        self.journal = SnapshotJournal(path, **kwargs)
+        return self.journal
+
+    def close_journal(self):
+        if self.journal:
+            self.journal.close()
+            self.journal = None
+
+    def invalidate_page_source(self):
+        # 界面可能已发生变化，丢弃快照，之前查找到的元素句柄也不再复用
+        self.snapshot.invalidate()
+        self.generation += 1
+
+    def cache_stats(self) -> dict:
+        # 界面快照及元素句柄缓存的命中情况
+        return {'page_source': self.snapshot.stats(), 'elements': self.element_cache.stats()}
+
+    def get_local_hierarchy(self) -> LocalHierarchy:
+        # 每份快照只解析一次
+        rs = self.get_page_source()
+        h = self._hierarchy
+        if h is None or h.source is not rs:
+            h = LocalHierarchy(rs, self)
+            self._hierarchy = h
+        return h
+
+    def tap(self, x: int, y: int):
+        """按坐标点击，设置了 tap_handler（如 adb input tap）则优先使用"""
+        try:
+            with self.timeline.span('tap', f'{x},{y}'):
+                if self.tap_handler:
+                    return self.tap_handler(x, y)
+                with self.metrics.timed(APPIUM, 'tap'):
+                    return self.dev.tap([(x, y)])
+        finally:
+            self.invalidate_page_source()
+
+    def check_exists(self, value: str) -> bool:
+        # 记录正在查找的内容，作为界面结构日志的标签
+        self._lookup = value
+        rs = self.retry.call(self.get_page_source, (WebDriverException,), 'page_source',
+                             on_retry=self._reconnect_on_retry)
+        return value in rs
+
+    mk_xpath = staticmethod(mk_xpath)
+
+    def _find_local(self, value: str, by: str) -> Optional[List[LocalElement]]:
+        # 本地查找，不支持的查找方式返回 None
+        if not self.local_locator:
+            return None
+        try:
+            return self.get_local_hierarchy().find_all(value, by)
+        except ParseError as e:
+            log.warning(f'本地解析界面结构失败，改由 Appium 服务查找: {e}')
+            return None
 
     def find_element_by_xpath(self, value: str, view_tag=None, key=None, is_contains=False):
+        xpath = self.mk_xpath(value, view_tag, key, is_contains)
         if self.check_exists(value):
-            # 关键字存在，但不一定代表指定的ui元素存在
+            # 关键字存在，但不一定代表指定的ui元素存在；界面中已不存在时不能使用缓存的元素
+            v = self.element_cache.get(AppiumBy.XPATH, xpath, self.generation)
+            if v is not None:
+                return v
+            rs = self._find_local(xpath, AppiumBy.XPATH)
+            if rs is not None:
+                return rs and rs[0] or None
+            generation = self.generation
             try:
-                return self.dev.find_element(by=AppiumBy.XPATH, value=self.mk_xpath(value, view_tag, key, is_contains))
+                with self.metrics.timed(APPIUM, 'find_element', xpath):
+                    v = self.dev.find_element(by=AppiumBy.XPATH, value=xpath)
             except NoSuchElementException:
-                pass
+                return None
+            self.element_cache.put(AppiumBy.XPATH, xpath, generation, v)
+            return v
 
     def find_elements_by_xpath(self, value: str, view_tag=None, key=None, is_contains=False):
         if self.check_exists(value):
+            xpath = self.mk_xpath(value, view_tag, key, is_contains)
+            rs = self._find_local(xpath, AppiumBy.XPATH)
+            if rs is not None:
+                return rs
             try:
-                return self.dev.find_elements(by=AppiumBy.XPATH, value=self.mk_xpath(value, view_tag, key, is_contains))
+                with self.metrics.timed(APPIUM, 'find_elements', xpath):
+                    return self.dev.find_elements(by=AppiumBy.XPATH, value=xpath)
             except NoSuchElementException:
                 pass
 
-    def find_element(self, value: str, by: str = None) -> WebElement:
+    def find_element(self, value: str, by: str = None) -> Union[WebElement, LocalElement]:
+        by = by or AppiumBy.ID
         if self.check_exists(value):
+            # 先确认当前界面中仍存在，再使用缓存的元素，避免元素已离开界面仍被视为存在
+            v = self.element_cache.get(by, value, self.generation)
+            if v is not None:
+                return v
+            rs = self._find_local(value, by)
+            if rs is not None:
+                return rs and rs[0] or None
+            generation = self.generation
             try:
-                return self.dev.find_element(by=by or AppiumBy.ID, value=value)
+                with self.metrics.timed(APPIUM, 'find_element', value):
+                    v = self.dev.find_element(by=by, value=value)
             except NoSuchElementException:
-                pass
+                return None
+            self.element_cache.put(by, value, generation, v)
+            return v
+
+    def _resolve_stale(self, value: str, by: str = None):
+        # 缓存的元素句柄已失效，界面已发生变化，重新获取界面并查找
+        self.element_cache.drop(by or AppiumBy.ID, value, stale=True)
+        self.invalidate_page_source()
+        return self.find_element(value, by)
 
-    def find_elements(self, value: str, by: str = None) -> Union[List[WebElement], List]:
+    def find_elements(self, value: str, by: str = None) -> Union[List[WebElement], List[LocalElement], List]:
         if self.check_exists(value):
+            by = by or AppiumBy.ID
+            rs = self._find_local(value, by)
+            if rs is not None:
+                return rs
             try:
-                return self.dev.find_elements(by=by or AppiumBy.ID, value=value)
+                with self.metrics.timed(APPIUM, 'find_elements', value):
+                    return self.dev.find_elements(by=by, value=value)
             except NoSuchElementException:
                 pass
 
-    def exist(self, resource: str, by: str = None, timeout: int = None):
+    def wait_until(self, fn, timeout: float = None, label: str = '') -> WaitResult:
+        """
+        轮询等待 fn 返回真值，每次重新判断前丢弃界面快照
+        :param fn: 判断函数
+        :param timeout: 超时秒数，支持小数，为空则只判断一次
+        :param label: 等待的描述，会记录到 waiter.records 中
+        :return: WaitResult
+        """
+        rs = self.waiter.wait(fn, timeout, label, on_retry=self.invalidate_page_source)
+        if rs.slept:
+            self.metrics.observe(SLEEP, 'wait', rs.slept, label)
+        return rs
+
+    def wait_until_idle(self, quiet: float = 0.5, timeout: float = 5.0, interval: float = 0.2) -> WaitResult:
+        """
+        等待界面稳定：连续 quiet 秒内界面结构不再变化，最多等待 timeout 秒。可代替操作后的固定 sleep
+        :param quiet: 界面保持不变多少秒视为稳定
+        :param timeout: 最长等待秒数，超时不抛异常，返回的 WaitResult 为假
+        :param interval: 两次获取界面结构的间隔秒数
+        :return: WaitResult
+        """
+        rs = self.waiter.wait_stable(lambda: zlib.crc32(self.get_page_source(refresh=True).encode('utf-8')),
+                                     quiet, timeout, 'idle', interval)
+        if rs.slept:
+            self.metrics.observe(SLEEP, 'wait_idle', rs.slept)
+        if not rs:
+            log.warning(f'界面在 {timeout}s 内未稳定')
+        return rs
+
+    @property
+    def last_wait(self) -> Optional[WaitResult]:
+        # 最近一次等待的实际耗时等信息
+        return self.waiter.records[-1] if self.waiter.records else None
+
+    def exist(self, resource: str, by: str = None, timeout: float = None):
         """是否存在某元素，存在则返回对应元素
         :param resource: 要判断的资源，可以是 元素id，元素标签，x-path等，详情查看 AppiumBy
         :param by: 支持的资源筛查类型，详情查看 AppiumBy，可为空，则按默认：资源ID
-        :param timeout: 要循环判断的秒数（每秒1次），为空则不重复判断
+        :param timeout: 最长等待秒数，支持小数。立即判断一次，之后按 waiter 的退避间隔轮询；为空则不重复判断
         :return 如果存在，则返回对应 Element 对象，否则返回 False
         """
         if not timeout:
             return self.find_element(resource, by) or False
-        for i in range(timeout):
-            time.sleep(1)
-            v = self.find_element(resource, by)
+        return self.wait_until(lambda: self.find_element(resource, by), timeout, resource).value or False
+
+    def exist_any(self, resources: Sequence[Union[str, Tuple[str, Optional[str]]]],
+                  timeout: float = None) -> Tuple[int, Any]:
+        """同时等待多个元素，返回最先出现的一个。每轮只获取一次界面结构，N 个元素最多只等待一个 timeout
+        :param resources: 资源列表，每项为 资源 或 (资源, by)
+        :param timeout: 最长等待秒数，支持小数，为空则不重复判断
+        :return (匹配到的序号, 对应 Element 对象)，均不存在则返回 (-1, False)
+        """
+        items = [(r, None) if isinstance(r, str) else tuple(r) for r in resources]
+
+        def _find():
+            # 各定位符在同一份界面结构上判断，与 page_source_ttl 无关
+            with self.snapshot.hold():
+                for i, (resource, by) in enumerate(items):
+                    v = self.find_element(resource, by)
+                    if v:
+                        return i, v
+
+        rs = self.wait_until(_find, timeout, ' | '.join(r for r, _ in items)).value
+        return rs or (-1, False)
+
+    def click(self, resource: str, by: str = None, on_exists=False, timeout: float = None):
+        with self.timeline.span('click', resource):
+            v = self.exist(resource=resource, by=by, timeout=timeout)
             if v:
+                try:
+                    try:
+                        self._click_element(v, resource)
+                    except StaleElementReferenceException:
+                        v = self._resolve_stale(resource, by)
+                        if not v:
+                            if on_exists:
+                                return None
+                            raise ElementNotFoundError(resource)
+                        self._click_element(v, resource)
+                except WebDriverException as e:
+                    # 经实测，这里都是点击触发后出现的异常(socket hang up)，点击动作能正常执行，暂未明确原因，可直接重连后继续其他操作。
+                    log.warning('点击后出现异常：%s\n\n即将重新连接...', e)
+                    self.retry.note_retry('click')
+                    self.reconnect()
+                finally:
+                    self.invalidate_page_source()
                 return v
-        return False
-
-    def click(self, resource: str, by: str = None, on_exists=False, timeout: int = None):
-        v = self.exist(resource=resource, by=by, timeout=timeout)
-        if v:
-            try:
+            if not on_exists:
+                raise ElementNotFoundError(resource)
+
+    def _click_element(self, v: Union[WebElement, LocalElement], resource: str):
+        if isinstance(v, LocalElement):
+            # 坐标点击，耗时已在 tap 中统计
+            v.click()
+        else:
+            with self.metrics.timed(APPIUM, 'click', resource):
                 v.click()
-            except WebDriverException as e:
-                # 经实测，这里都是点击触发后出现的异常(socket hang up)，点击动作能正常执行，暂未明确原因，可直接重连后继续其他操作。
-                log.warning('点击后出现异常：%s\n\n即将重新连接...', e)
-                self.reconnect()
-            return v
-        if not on_exists:
-            raise ElementNotFoundError(resource)
 
-    def match_content(self, resource: str, txt_or_re, by: str = None, on_exists=False, timeout: int = None) -> bool:
+    def match_content(self, resource: str, txt_or_re, by: str = None, on_exists=False, timeout: float = None) -> bool:
         v = self.exist(resource=resource, by=by, timeout=timeout)
         if v:
+            try:
+                text = v.text
+            except StaleElementReferenceException:
+                v = self._resolve_stale(resource, by)
+                if not v:
+                    if not on_exists:
+                        raise ElementNotFoundError(resource)
+                    return False
+                text = v.text
             if hasattr(txt_or_re, 'match'):
-                return txt_or_re.match(v.text)
-            return txt_or_re == v.text
+                return txt_or_re.match(text)
+            return txt_or_re == text
         if not on_exists:
             raise ElementNotFoundError(resource)
         return False
 
     def swipe(self, x0: int, y0: int, x1: int, y1: int, duration: int = 300):
-        return self.dev.swipe(x0, y0, x1, y1, duration=duration)
+        try:
+            with self.timeline.span('swipe', f'{x0},{y0}->{x1},{y1}'), self.metrics.timed(APPIUM, 'swipe'):
+                return self.dev.swipe(x0, y0, x1, y1, duration=duration)
+        finally:
+            self.invalidate_page_source()
 
-    def reconnect(self):
-        self.quit()
+    def perform_actions(self, actions: List[dict]):
+        """以单个 W3C 动作序列发送触摸操作，只需一次请求"""
+        try:
+            with self.timeline.span('actions'), self.metrics.timed(APPIUM, 'actions'):
+                return self.dev.execute(Command.W3C_ACTIONS, {'actions': [{
+                    'type': 'pointer', 'id': 'finger', 'parameters': {'pointerType': 'touch'}, 'actions': actions}]})
+        finally:
+            self.invalidate_page_source()
+
+    def _get_visible_content(self) -> frozenset:
+        # 当前界面可见内容（resource-id、文本）的集合，用于判断滚动是否已到尽头
+        return frozenset((e.resource_id, e.text, e.content_desc) for e in self.get_local_hierarchy().elements
+                         if e.resource_id or e.text or e.content_desc)
+
+    def _get_scroll_area(self, screen: Tuple[int, int] = None) -> Tuple[int, int, int, int]:
+        # 优先使用界面中最大的可滚动容器，否则使用整个屏幕
+        best = None
+        for e in self.get_local_hierarchy().elements:
+            if e.attrib.get('scrollable') == 'true':
+                x0, y0, x1, y1 = e.bounds
+                if x1 > x0 and y1 > y0 and (best is None or (x1 - x0) * (y1 - y0) > best[0]):
+                    best = ((x1 - x0) * (y1 - y0), e.bounds)
+        if best:
+            return best[1]
+        if screen is None:
+            with self.metrics.timed(APPIUM, 'window_rect'):
+                r = self.dev.execute(Command.GET_WINDOW_RECT)['value']
+            screen = (r['width'], r['height'])
+        return 0, 0, screen[0], screen[1]
+
+    def scroll_to(self, resource: str, by: str = None, direction: str = 'down', max_swipes: int = 20,
+                  area: Tuple[int, int, int, int] = None, screen: Tuple[int, int] = None, distance: float = 0.5,
+                  duration: int = 300):
+        """
+        滚动查找元素：每次滑动前后比较界面可见内容，找到元素立即停止，内容不再变化时视为已到列表尽头
+        :param resource: 要查找的资源，同 exist
+        :param by: 查找方式，同 exist
+        :param direction: 滚动方向 down/up/left/right，即希望看到的内容所在方向
+        :param max_swipes: 最多滑动次数
+        :param area: 滑动区域 (x0, y0, x1, y1)，为空则使用最大的可滚动容器或整个屏幕
+        :param screen: 屏幕宽高，找不到可滚动容器时使用，为空则向 Appium 服务获取
+        :param distance: 每次滑动距离占区域的比例
+        :param duration: 每次滑动的毫秒数
+        :return: 找到则返回对应 Element 对象，否则返回 False
+        """
+        if direction not in ('down', 'up', 'left', 'right'):
+            raise ValueError(f'unsupported direction: {direction}')
+        with self.timeline.span('scroll_to', resource):
+            last = None
+            for i in range(max_swipes + 1):
+                v = self.find_element(resource, by)
+                if v:
+                    return v
+                content = self._get_visible_content()
+                if content == last:
+                    log.info(f'滚动到尽头，未找到：{resource}')
+                    return False
+                if i == max_swipes:
+                    break
+                last = content
+                x0, y0, x1, y1 = area or self._get_scroll_area(screen)
+                cx, cy = (x0 + x1) // 2, (y0 + y1) // 2
+                dx, dy = int((x1 - x0) * distance / 2), int((y1 - y0) * distance / 2)
+                # 手指移动方向与内容滚动方向相反
+                start, end = {
+                    'down': ((cx, cy + dy), (cx, cy - dy)),
+                    'up': ((cx, cy - dy), (cx, cy + dy)),
+                    'right': ((cx + dx, cy), (cx - dx, cy)),
+                    'left': ((cx - dx, cy), (cx + dx, cy)),
+                }[direction]
+                # 抬起前短暂停留，避免惯性滚动，滑动后可立即获取界面
+                self.perform_actions([
+                    {'type': 'pointerMove', 'duration': 0, 'x': start[0], 'y': start[1]},
+                    {'type': 'pointerDown', 'button': 0},
+                    {'type': 'pointerMove', 'duration': duration, 'x': end[0], 'y': end[1]},
+                    {'type': 'pause', 'duration': 100},
+                    {'type': 'pointerUp', 'button': 0},
+                ])
+            log.info(f'滑动 {max_swipes} 次后仍未找到：{resource}')
+            return False
+
+    def reconnect(self, retry=True):
+        """
+        :param retry: 是否按重试策略多次尝试；在其他调用的重试回调中应为否，由外层重试控制次数及总耗时
+        """
+        self.invalidate_page_source()
+        if self.session_pool:
+            if self._reattach_device():
+                return
+        else:
+            self._quit_device()
         log.warning(f'!!! Appium reconnect device...')
         try:
-            self._reconnect_device()
-            if self.dev is None:
-                log.warning('!!! Appium device reconnect failed! Try again...')
-                self.reconnect()
-        except WebDriverException as e:
+            with self.timeline.span('reconnect'), self.metrics.timed(APPIUM, 'reconnect'):
+                self.retry.call(self._reconnect_device, (WebDriverException,), 'reconnect',
+                                max_attempts=None if retry else 1)
+        except (WebDriverException, CircuitOpenError) as e:
             log.error(f'!!! Appium reconnect failed!\n{e}')
-            raise AppiumReconnectError
+            raise AppiumReconnectError(e)
+
+    def _reconnect_on_retry(self, e: BaseException, attempt: int):
+        # 作为重试回调只重连一次，失败时由外层重试继续，避免重试嵌套
+        try:
+            self.reconnect(retry=False)
+        except AppiumReconnectError as err:
+            log.warning(f'!!! 第 {attempt} 次重连失败：{err}')
 
     def quit(self):
+        # 写完界面结构日志中尚未写入的记录，后台写入线程随进程退出时会丢失这些记录
+        self.close_journal()
+        self._quit_device()
+
+    def _quit_device(self):
+        # 只关闭（或归还）会话，重连时使用，不关闭界面结构日志
         log.warning('!!! Appium device quit !!!')
         try:
-            self.dev.quit()
+            if self.session_pool:
+                # 归还到会话池，保持会话以便复用
+                self.session_pool.release(self.dev)
+            else:
+                self.dev.quit()
         except:
             pass
         finally:
@@ -0,0 +1,460 @@
+import asyncio
+import weakref
+from typing import Union, List, Any, Optional, Tuple, Sequence, Dict
+from xml.etree.ElementTree import ParseError
+
+from selenium.common.exceptions import WebDriverException, NoSuchElementException, \
+    StaleElementReferenceException, InvalidSessionIdException
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from .log import default as log
+from .snapshot import PageSnapshot
+from .wait import Waiter, WaitResult
+from .retry import RetryPolicy, CircuitOpenError
+from .metrics import Metrics, APPIUM, SLEEP
+from .timeline import UITimeline
+from .local_locator import LocalHierarchy, LocalElement, mk_xpath, BY_ID, BY_XPATH
+from .appium_device import AppiumDevice, ElementNotFoundError, AppiumReconnectError
+
+ELEMENT_KEY = 'element-6066-11e4-a52e-4f735466cecf'
+DEFAULT_SERVER_URL = 'http://localhost:4723/wd/hub'
+
+# W3C 标准中的能力项，其余项需要加上 `appium:` 前缀
+W3C_CAPABILITIES = frozenset((
+    'platformName', 'browserName', 'browserVersion', 'acceptInsecureCerts', 'pageLoadStrategy', 'proxy',
+    'setWindowRect', 'timeouts', 'unhandledPromptBehavior', 'strictFileInteractability'))
+
+_ERRORS = {
+    'no such element': NoSuchElementException,
+    'stale element reference': StaleElementReferenceException,
+    'invalid session id': InvalidSessionIdException,
+}
+
+
+def to_w3c_capabilities(cfg: dict) -> dict:
+    return {k if k in W3C_CAPABILITIES or ':' in k else f'appium:{k}': v for k, v in cfg.items()}
+
+
+class AsyncHttpClient:
+    """
+    基于 aiohttp 的连接池，同一事件循环内的 AsyncAppiumDevice 共用，避免每台设备各自维护连接
+    """
+
+    def __init__(self, limit: int = 100, limit_per_host: int = 0, timeout: float = 120.0):
+        """
+        :param limit: 连接池总连接数上限
+        :param limit_per_host: 每个 Appium 服务的连接数上限，0 为不限制
+        :param timeout: 单个请求的默认超时秒数
+        """
+        if aiohttp is None:
+            raise ImportError('AsyncAppiumDevice 需要 aiohttp，请执行：pip install perf-appium[async]')
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.timeout = timeout
+        self._session = None
+
+    def _get_session(self):
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.limit, limit_per_host=self.limit_per_host),
+                timeout=aiohttp.ClientTimeout(total=self.timeout))
+        return self._session
+
+    async def request(self, method: str, url: str, body: dict = None, timeout: float = None) -> Any:
+        """
+        发送 W3C 请求
+        :return: 响应中的 value；服务端返回错误时抛出对应的 selenium 异常，网络错误及超时抛出 WebDriverException
+        """
+        kw = {'json': body if body is not None else {}} if method == 'POST' else {}
+        if timeout:
+            kw['timeout'] = aiohttp.ClientTimeout(total=timeout)
+        try:
+            async with self._get_session().request(method, url, **kw) as r:
+                data = await r.json(content_type=None)
+                status = r.status
+        except asyncio.TimeoutError as e:
+            raise WebDriverException(f'{method} {url} timeout') from e
+        except aiohttp.ClientError as e:
+            raise WebDriverException(f'{method} {url} failed: {e}') from e
+        value = (data or {}).get('value')
+        if status >= 400 or (isinstance(value, dict) and 'error' in value):
+            value = value if isinstance(value, dict) else {}
+            raise _ERRORS.get(value.get('error'), WebDriverException)(value.get('message') or f'HTTP {status}')
+        return value
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+_shared_clients = weakref.WeakKeyDictionary()  # type: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncHttpClient]
+
+
+def get_shared_client() -> AsyncHttpClient:
+    # 每个事件循环一个共享连接池，需在协程中调用
+    loop = asyncio.get_running_loop()
+    client = _shared_clients.get(loop)
+    if client is None:
+        client = _shared_clients[loop] = AsyncHttpClient()
+    return client
+
+
+class AsyncElement:
+    # 服务端元素的异步封装
+
+    __slots__ = ('device', 'id')
+
+    def __init__(self, device: 'AsyncAppiumDevice', element_id: str):
+        self.device = device
+        self.id = element_id
+
+    async def click(self):
+        return await self.device.request('POST', f'/element/{self.id}/click')
+
+    async def get_text(self) -> str:
+        return await self.device.request('GET', f'/element/{self.id}/text')
+
+    async def get_rect(self) -> Dict[str, int]:
+        return await self.device.request('GET', f'/element/{self.id}/rect')
+
+    def __repr__(self):
+        return f'<AsyncElement {self.id}>'
+
+
+class AsyncAppiumDevice:
+    """
+    AppiumDevice 的异步版本：直接通过 W3C 协议与 Appium 服务通信，多台设备共用一个连接池，
+    等待使用 asyncio.sleep，可在一个事件循环中同时驱动多台设备。
+    查找、等待、快照、重试、耗时统计的行为与 AppiumDevice 一致。
+    """
+
+    @classmethod
+    async def open_remote_driver(cls, appium_server_url: str = None, client: AsyncHttpClient = None,
+                                 **cfg) -> 'AsyncAppiumDevice':
+        """
+        启动 Appium 会话
+        :param appium_server_url: Appium服务端地址
+        :param client: 连接池，默认使用当前事件循环的共享连接池
+        :param cfg: 键值对配置项，参数健值请参考appium客户端配置
+        :return: AsyncAppiumDevice
+        """
+        dev = cls(appium_server_url or DEFAULT_SERVER_URL, None, cfg, client=client)
+        await dev._new_session()
+        return dev
+
+    @classmethod
+    def from_sync(cls, dev: AppiumDevice, client: AsyncHttpClient = None) -> 'AsyncAppiumDevice':
+        """
+        绑定同步 AppiumDevice 已打开的会话，共用其重试策略及耗时统计，便于逐个场景迁移
+        """
+        return cls(dev.appium_server_url, dev.dev.session_id, dev.config, client=client, retry=dev.retry,
+                   metrics=dev.metrics, timeline=dev.timeline, local_locator=dev.local_locator,
+                   page_source_ttl=dev.snapshot.ttl)
+
+    def __init__(self, appium_server_url: str, session_id: Optional[str], config: dict,
+                 client: AsyncHttpClient = None, page_source_ttl: Optional[float] = 1.0, local_locator=False,
+                 retry: RetryPolicy = None, metrics: Metrics = None, timeline: UITimeline = None):
+        """
+        :param appium_server_url: Appium服务端地址
+        :param session_id: 已有的会话，为空则需先调用 open_remote_driver 或 reconnect
+        :param config: 会话配置，重连时使用
+        :param client: 连接池，默认使用当前事件循环的共享连接池
+        :param page_source_ttl: page_source 快照有效秒数，详见 PageSnapshot
+        :param local_locator: 是否在本地解析界面结构来查找元素
+        :param retry: 获取界面、重连等操作的重试策略，默认 RetryPolicy()
+        :param metrics: 各往返操作的耗时统计，默认 Metrics()
+        :param timeline: 界面操作时间线，默认 UITimeline()
+        """
+        self.appium_server_url = appium_server_url.rstrip('/')
+        self.session_id = session_id
+        self.config = dict(config)
+        self._client = client
+        self.retry = retry or RetryPolicy()
+        self.metrics = metrics or Metrics()
+        # UITimeline 定义了 __len__，为空时为假值，不能用 or 判断
+        self.timeline = timeline if timeline is not None else UITimeline()
+        self.snapshot = PageSnapshot(page_source_ttl)
+        self.local_locator = local_locator
+        self.tap_handler = None
+        self._hierarchy = None
+        self.waiter = Waiter()
+
+    @property
+    def client(self) -> AsyncHttpClient:
+        if self._client is None:
+            self._client = get_shared_client()
+        return self._client
+
+    async def request(self, method: str, path: str, body: dict = None, timeout: float = None) -> Any:
+        # 发送当前会话的请求，path 为会话下的相对路径
+        if not self.session_id:
+            raise RuntimeError('设备对象丢失，请重试！')
+        return await self.client.request(
+            method, f'{self.appium_server_url}/session/{self.session_id}{path}', body, timeout)
+
+    async def _new_session(self):
+        rs = await self.client.request('POST', f'{self.appium_server_url}/session', {
+            'capabilities': {'firstMatch': [{}], 'alwaysMatch': to_w3c_capabilities(self.config)}})
+        self.session_id = rs['sessionId']
+        log.debug(f'{type(self)} open Appium device session [{self.session_id}] '
+                  f'on server [{self.appium_server_url}] with config: {self.config}')
+
+    async def execute_script(self, script: str, *args):
+        with self.metrics.timed(APPIUM, 'execute_script', script):
+            return await self.request('POST', '/execute/sync', {'script': script, 'args': list(args)})
+
+    async def get_page_source(self, refresh=False) -> str:
+        """
+        获取界面结构，优先复用快照
+        :param refresh: 是否忽略快照，强制重新获取
+        :return:
+        """
+        if not refresh:
+            rs = self.snapshot.get()
+            if rs is not None:
+                return rs
+        with self.metrics.timed(APPIUM, 'page_source'):
+            rs = await self.request('GET', '/source')
+        self.snapshot.update(rs)
+        return rs
+
+    page_source = get_page_source
+
+    def invalidate_page_source(self):
+        # 界面可能已发生变化，丢弃快照
+        self.snapshot.invalidate()
+
+    async def get_local_hierarchy(self) -> LocalHierarchy:
+        # 每份快照只解析一次；本地元素的 click 为同步调用，请使用 AsyncAppiumDevice.click
+        rs = await self.get_page_source()
+        h = self._hierarchy
+        if h is None or h.source is not rs:
+            h = LocalHierarchy(rs)
+            self._hierarchy = h
+        return h
+
+    async def _perform_actions(self, actions: List[dict]):
+        await self.request('POST', '/actions', {'actions': [{
+            'type': 'pointer', 'id': 'finger', 'parameters': {'pointerType': 'touch'}, 'actions': actions}]})
+
+    async def tap(self, x: int, y: int):
+        """按坐标点击，设置了 tap_handler 则优先使用（可以是普通函数或协程函数）"""
+        try:
+            with self.timeline.span('tap', f'{x},{y}'):
+                if self.tap_handler:
+                    rs = self.tap_handler(x, y)
+                    return await rs if asyncio.iscoroutine(rs) else rs
+                with self.metrics.timed(APPIUM, 'tap'):
+                    return await self._perform_actions([
+                        {'type': 'pointerMove', 'duration': 0, 'x': x, 'y': y},
+                        {'type': 'pointerDown', 'button': 0},
+                        {'type': 'pause', 'duration': 100},
+                        {'type': 'pointerUp', 'button': 0},
+                    ])
+        finally:
+            self.invalidate_page_source()
+
+    async def check_exists(self, value: str) -> bool:
+        rs = await self.retry.acall(self.get_page_source, (WebDriverException,), 'page_source',
+                                    on_retry=self._reconnect_on_retry)
+        return value in rs
+
+    mk_xpath = staticmethod(mk_xpath)
+
+    async def _find_local(self, value: str, by: str) -> Optional[List[LocalElement]]:
+        # 本地查找，不支持的查找方式返回 None
+        if not self.local_locator:
+            return None
+        try:
+            return (await self.get_local_hierarchy()).find_all(value, by)
+        except ParseError as e:
+            log.warning(f'本地解析界面结构失败，改由 Appium 服务查找: {e}')
+            return None
+
+    async def _find(self, value: str, by: str, many: bool):
+        rs = await self._find_local(value, by)
+        if rs is not None:
+            return rs if many else rs and rs[0] or None
+        try:
+            if many:
+                with self.metrics.timed(APPIUM, 'find_elements', value):
+                    rs = await self.request('POST', '/elements', {'using': by, 'value': value})
+                return [AsyncElement(self, i[ELEMENT_KEY]) for i in rs]
+            with self.metrics.timed(APPIUM, 'find_element', value):
+                rs = await self.request('POST', '/element', {'using': by, 'value': value})
+            return AsyncElement(self, rs[ELEMENT_KEY])
+        except NoSuchElementException:
+            pass
+
+    async def find_element_by_xpath(self, value: str, view_tag=None, key=None, is_contains=False):
+        if await self.check_exists(value):
+            # 关键字存在，但不一定代表指定的ui元素存在
+            return await self._find(self.mk_xpath(value, view_tag, key, is_contains), BY_XPATH, False)
+
+    async def find_elements_by_xpath(self, value: str, view_tag=None, key=None, is_contains=False):
+        if await self.check_exists(value):
+            return await self._find(self.mk_xpath(value, view_tag, key, is_contains), BY_XPATH, True)
+
+    async def find_element(self, value: str, by: str = None) -> Union[AsyncElement, LocalElement, None]:
+        if await self.check_exists(value):
+            return await self._find(value, by or BY_ID, False)
+
+    async def _resolve_stale(self, value: str, by: str = None):
+        # 元素句柄已失效，界面已发生变化，重新获取界面并查找
+        self.invalidate_page_source()
+        return await self.find_element(value, by)
+
+    async def find_elements(self, value: str, by: str = None) -> Union[List[AsyncElement], List[LocalElement], None]:
+        if await self.check_exists(value):
+            return await self._find(value, by or BY_ID, True)
+
+    async def wait_until(self, fn, timeout: float = None, label: str = '') -> WaitResult:
+        """
+        轮询等待 fn（协程函数）返回真值，每次重新判断前丢弃界面快照
+        :param fn: 判断函数，返回 awaitable
+        :param timeout: 超时秒数，支持小数，为空则只判断一次
+        :param label: 等待的描述，会记录到 waiter.records 中
+        :return: WaitResult
+        """
+        rs = await self.waiter.wait_async(fn, timeout, label, on_retry=self.invalidate_page_source)
+        if rs.slept:
+            self.metrics.observe(SLEEP, 'wait', rs.slept, label)
+        return rs
+
+    @property
+    def last_wait(self) -> Optional[WaitResult]:
+        return self.waiter.records[-1] if self.waiter.records else None
+
+    async def exist(self, resource: str, by: str = None, timeout: float = None):
+        """是否存在某元素，存在则返回对应元素，否则返回 False，参数同 AppiumDevice.exist"""
+        if not timeout:
+            return await self.find_element(resource, by) or False
+        return (await self.wait_until(lambda: self.find_element(resource, by), timeout, resource)).value or False
+
+    async def exist_any(self, resources: Sequence[Union[str, Tuple[str, Optional[str]]]],
+                        timeout: float = None) -> Tuple[int, Any]:
+        """同时等待多个元素，返回最先出现的一个，参数同 AppiumDevice.exist_any
+        :return (匹配到的序号, 对应 Element 对象)，均不存在则返回 (-1, False)
+        """
+        items = [(r, None) if isinstance(r, str) else tuple(r) for r in resources]
+
+        async def _find():
+            # 各定位符在同一份界面结构上判断，与 page_source_ttl 无关
+            with self.snapshot.hold():
+                for i, (resource, by) in enumerate(items):
+                    v = await self.find_element(resource, by)
+                    if v:
+                        return i, v
+
+        rs = (await self.wait_until(_find, timeout, ' | '.join(r for r, _ in items))).value
+        return rs or (-1, False)
+
+    async def click(self, resource: str, by: str = None, on_exists=False, timeout: float = None):
+        with self.timeline.span('click', resource):
+            v = await self.exist(resource=resource, by=by, timeout=timeout)
+            if v:
+                try:
+                    try:
+                        await self._click_element(v, resource)
+                    except StaleElementReferenceException:
+                        v = await self._resolve_stale(resource, by)
+                        if not v:
+                            if on_exists:
+                                return None
+                            raise ElementNotFoundError(resource)
+                        await self._click_element(v, resource)
+                except WebDriverException as e:
+                    # 与 AppiumDevice.click 一致：点击已触发，重连后继续其他操作
+                    log.warning('点击后出现异常：%s\n\n即将重新连接...', e)
+                    self.retry.note_retry('click')
+                    await self.reconnect()
+                finally:
+                    self.invalidate_page_source()
+                return v
+            if not on_exists:
+                raise ElementNotFoundError(resource)
+
+    async def _click_element(self, v: Union[AsyncElement, LocalElement], resource: str):
+        if isinstance(v, LocalElement):
+            # 坐标点击，耗时已在 tap 中统计
+            await self.tap(*v.center)
+        else:
+            with self.metrics.timed(APPIUM, 'click', resource):
+                await v.click()
+
+    @staticmethod
+    async def _get_text(v: Union[AsyncElement, LocalElement]) -> str:
+        return v.text if isinstance(v, LocalElement) else await v.get_text()
+
+    async def match_content(self, resource: str, txt_or_re, by: str = None, on_exists=False,
+                            timeout: float = None) -> bool:
+        v = await self.exist(resource=resource, by=by, timeout=timeout)
+        if v:
+            try:
+                text = await self._get_text(v)
+            except StaleElementReferenceException:
+                v = await self._resolve_stale(resource, by)
+                if not v:
+                    if not on_exists:
+                        raise ElementNotFoundError(resource)
+                    return False
+                text = await self._get_text(v)
+            if hasattr(txt_or_re, 'match'):
+                return txt_or_re.match(text)
+            return txt_or_re == text
+        if not on_exists:
+            raise ElementNotFoundError(resource)
+        return False
+
+    async def swipe(self, x0: int, y0: int, x1: int, y1: int, duration: int = 300):
+        try:
+            with self.timeline.span('swipe', f'{x0},{y0}->{x1},{y1}'), self.metrics.timed(APPIUM, 'swipe'):
+                return await self._perform_actions([
+                    {'type': 'pointerMove', 'duration': 0, 'x': x0, 'y': y0},
+                    {'type': 'pointerDown', 'button': 0},
+                    {'type': 'pointerMove', 'duration': duration, 'x': x1, 'y': y1},
+                    {'type': 'pointerUp', 'button': 0},
+                ])
+        finally:
+            self.invalidate_page_source()
+
+    async def sleep(self, seconds: float):
+        with self.timeline.span('sleep'), self.metrics.timed(SLEEP, 'sleep'):
+            await asyncio.sleep(seconds)
+
+    async def reconnect(self, retry=True):
+        """
+        :param retry: 是否按重试策略多次尝试；在其他调用的重试回调中应为否，由外层重试控制次数及总耗时
+        """
+        self.invalidate_page_source()
+        await self.quit()
+        log.warning('!!! Appium reconnect device...')
+        try:
+            with self.metrics.timed(APPIUM, 'reconnect'):
+                await self.retry.acall(self._new_session, (WebDriverException,), 'reconnect',
+                                       max_attempts=None if retry else 1)
+        except (WebDriverException, CircuitOpenError) as e:
+            log.error(f'!!! Appium reconnect failed!\n{e}')
+            raise AppiumReconnectError(e)
+
+    async def _reconnect_on_retry(self, e: BaseException, attempt: int):
+        # 作为重试回调只重连一次，失败时由外层重试继续，避免重试嵌套
+        try:
+            await self.reconnect(retry=False)
+        except AppiumReconnectError as err:
+            log.warning(f'!!! 第 {attempt} 次重连失败：{err}')
+
+    async def quit(self):
+        log.warning('!!! Appium device quit !!!')
+        try:
+            if self.session_id:
+                await self.client.request('DELETE', f'{self.appium_server_url}/session/{self.session_id}')
+        except Exception:
+            pass
+        finally:
+            self.session_id = None
@@ -0,0 +1,66 @@
+import abc
+from typing import Union, List, Sequence, Tuple, Optional, Any
+
+from .async_device import AsyncAppiumDevice, AsyncElement
+
+
+class AsyncBaseUI(metaclass=abc.ABCMeta):
+    # BaseUI 的异步版本，各方法与 BaseUI 同名同参数，返回 awaitable
+
+    def __init__(self, dev: AsyncAppiumDevice):
+        self.dev = dev
+
+    async def find_element(self, value: str, by: str = None) -> AsyncElement:
+        return await self.dev.find_element(value, by)
+
+    async def find_elements(self, value: str, by: str = None) -> Union[List[AsyncElement], List]:
+        return await self.dev.find_elements(value, by)
+
+    async def find_element_by_xpath(self, value: str, view_tag=None, key=None, is_contains=False):
+        return await self.dev.find_element_by_xpath(value, view_tag, key, is_contains)
+
+    async def find_elements_by_xpath(self, value: str, view_tag=None, key=None, is_contains=False):
+        return await self.dev.find_elements_by_xpath(value, view_tag, key, is_contains)
+
+    async def exist(self, resource: str, by: str = None, timeout: float = None):
+        return await self.dev.exist(resource, by, timeout)
+
+    async def exist_any(self, resources: Sequence[Union[str, Tuple[str, Optional[str]]]],
+                        timeout: float = None) -> Tuple[int, Any]:
+        return await self.dev.exist_any(resources, timeout)
+
+    async def wait_until(self, fn, timeout: float = None, label: str = ''):
+        return await self.dev.wait_until(fn, timeout, label)
+
+    async def click(self, resource: str, by: str = None, on_exists=False, timeout: float = None):
+        return await self.dev.click(resource, by, on_exists, timeout)
+
+    @abc.abstractmethod
+    async def input(self, value: str):
+        raise NotImplementedError
+
+    async def match_content(self, resource: str, txt_or_re, by: str = None, on_exists=False,
+                            timeout: float = None) -> bool:
+        return await self.dev.match_content(resource, txt_or_re, by, on_exists, timeout)
+
+    async def swipe(self, x0: int, y0: int, x1: int, y1: int, duration: int = 300):
+        return await self.dev.swipe(x0, y0, x1, y1, duration=duration)
+
+    async def tap(self, x: int, y: int):
+        return await self.dev.tap(x, y)
+
+    async def execute_script(self, script: str, *args):
+        return await self.dev.execute_script(script, *args)
+
+    async def page_source(self, refresh=False) -> str:
+        return await self.dev.get_page_source(refresh)
+
+    @abc.abstractmethod
+    def get_device_resolution(self) -> (int, int):
+        raise NotImplementedError
+
+    async def quit(self):
+        return await self.dev.quit()
+
+    async def sleep(self, seconds: float):
+        return await self.dev.sleep(seconds)
@@ -0,0 +1,144 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Any, Dict, List, Iterable, Optional
+
+from android_perf.base_adb import AdbProxy
+
+from .android_ui import AndroidBaseUI
+from .appium_device import AppiumDevice
+from .install_manager import InstallManager, InstallResult
+from .log import default as log
+
+
+class DeviceRunResult:
+    # 单台设备执行场景的结果及耗时
+    __slots__ = ('serial', 'server', 'result', 'error', 'setup_elapsed', 'elapsed')
+
+    def __init__(self, serial: str, server: str):
+        self.serial = serial
+        self.server = server
+        self.result = None
+        self.error: Optional[BaseException] = None
+        self.setup_elapsed = 0.0
+        self.elapsed = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def __repr__(self):
+        return (f'<DeviceRunResult {self.serial} on {self.server} ok={self.ok} '
+                f'setup={self.setup_elapsed:.2f}s elapsed={self.elapsed:.2f}s>')
+
+
+class DevicePool:
+    """
+    多设备并发调度：每台设备持有一个 AndroidBaseUI，通过线程池在所有设备上并行执行同一场景，
+    并限制每个 Appium 服务上同时运行的设备数。
+    如：
+        with DevicePool(MyUI, PureAdb.get_proxy, serials, ['http://host1:4723/wd/hub']) as pool:
+            results = pool.run(lambda ui: ui.click(...))
+    """
+
+    def __init__(self, ui_cls: Callable[[AdbProxy, AppiumDevice], AndroidBaseUI],
+                 adb_factory: Callable[[str], AdbProxy], serials: Iterable[str],
+                 appium_server_urls: List[str] = None, max_workers: int = None, max_per_server: int = 4, **cfg):
+        """
+        :param ui_cls: AndroidBaseUI 子类（或同签名的工厂函数）
+        :param adb_factory: 根据设备序列号创建 AdbProxy 的函数
+        :param serials: 设备序列号列表
+        :param appium_server_urls: Appium 服务地址列表，设备按顺序轮流分配；为空则使用默认地址
+        :param max_workers: 线程池大小，默认等于设备数
+        :param max_per_server: 每个 Appium 服务同时运行的设备数上限
+        :param cfg: 传给 AndroidBaseUI.open_android_driver_by_adb 的 Appium 配置，也可包含 local_locator、
+            page_source_ttl、session_pool 等 AppiumDevice 选项；retry、metrics、timeline 会被所有设备共用
+        """
+        self.ui_cls = ui_cls
+        self.adb_factory = adb_factory
+        self.serials = list(serials)
+        servers = appium_server_urls or [None]
+        self.servers = {s: servers[i % len(servers)] for i, s in enumerate(self.serials)}
+        self._server_limits = {s: threading.Semaphore(max_per_server) for s in servers}
+        self.cfg = cfg
+        self.uis = {}  # type: Dict[str, AndroidBaseUI]
+        self._uis_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers or max(len(self.serials), 1),
+                                            thread_name_prefix='perf-appium-device')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _open_ui(self, serial: str) -> AndroidBaseUI:
+        adb = self.adb_factory(serial)
+        # ui_cls 为 AndroidBaseUI 子类时使用其设备档案缓存
+        opener = getattr(self.ui_cls, 'open_android_driver_by_adb', AndroidBaseUI.open_android_driver_by_adb)
+        dev = opener(adb, self.servers[serial], **self.cfg)
+        return self.ui_cls(adb, dev)
+
+    def get_ui(self, serial: str) -> AndroidBaseUI:
+        # 每台设备只打开一次，之后的场景复用
+        with self._uis_lock:
+            ui = self.uis.get(serial)
+        if ui is None:
+            ui = self._open_ui(serial)
+            with self._uis_lock:
+                self.uis[serial] = ui
+        return ui
+
+    def _run_one(self, serial: str, scenario: Callable[[AndroidBaseUI], Any]) -> DeviceRunResult:
+        rs = DeviceRunResult(serial, self.servers[serial])
+        with self._server_limits[rs.server]:
+            start = time.monotonic()
+            try:
+                ui = self.get_ui(serial)
+                rs.setup_elapsed = time.monotonic() - start
+                start = time.monotonic()
+                rs.result = scenario(ui)
+            except Exception as e:
+                log.error(f'设备 [{serial}] 执行场景失败：{e}')
+                rs.error = e
+            rs.elapsed = time.monotonic() - start
+        log.info(f'{rs}')
+        return rs
+
+    def run(self, scenario: Callable[[AndroidBaseUI], Any], serials: Iterable[str] = None) -> Dict[str, DeviceRunResult]:
+        """
+        在所有（或指定）设备上并行执行场景，单台设备失败不影响其他设备
+        :param scenario: 以 AndroidBaseUI 为参数的场景函数
+        :param serials: 只在指定设备上执行，默认全部
+        :return: 以设备序列号为键的执行结果
+        """
+        futures = {s: self._executor.submit(self._run_one, s, scenario) for s in (serials or self.serials)}
+        return {s: f.result() for s, f in futures.items()}
+
+    def install_app(self, apk: str, force=False, serials: Iterable[str] = None,
+                    max_workers: int = None) -> Dict[str, InstallResult]:
+        """
+        在所有（或指定）设备上并行安装 APK，已安装相同版本的设备跳过
+        :param apk: APK 文件路径
+        :param force: 是否强制安装
+        :param serials: 只在指定设备上安装，默认全部
+        :param max_workers: 同时安装的设备数，默认等于设备数
+        :return: 以设备序列号为键的安装结果
+        """
+        serials = list(serials or self.serials)
+        with self._uis_lock:
+            uis = {s: self.uis[s] for s in serials if s in self.uis}
+        adbs = {s: uis[s].adb if s in uis else self.adb_factory(s) for s in serials}
+        # 已打开界面的设备通过 ui.install_app 安装，以便设备适配类处理安装确认
+        installers = {s: ui.install_app for s, ui in uis.items()}
+        return InstallManager(max_workers=max_workers or max(len(serials), 1)).install(apk, adbs, force, installers)
+
+    def close(self):
+        with self._uis_lock:
+            uis, self.uis = self.uis, {}
+        for serial, ui in uis.items():
+            try:
+                ui.close()
+            except Exception as e:
+                log.warning(f'关闭设备 [{serial}] 失败：{e}')
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,173 @@
+import os
+import json
+import time
+import threading
+from typing import Optional, Dict, Tuple
+
+from android_perf.base_adb import AdbProxy
+
+from .log import default as log
+
+DEFAULT_CACHE_PATH = os.path.join(
+    os.environ.get('PERF_APPIUM_CACHE_DIR') or os.path.join(os.path.expanduser('~'), '.cache', 'perf_appium'),
+    'device_profiles.json')
+
+# 建立档案时额外读取的系统属性
+CAPABILITY_PROPS = ('ro.build.version.sdk', 'ro.product.cpu.abi', 'ro.product.model')
+
+
+class DeviceProfile:
+    """设备档案：构建指纹不变时，系统版本、品牌、分辨率等信息不会变化"""
+
+    def __init__(self, serial: str, fingerprint: str, os_version: str, brand: str, resolution: Tuple[int, int],
+                 capabilities: Dict[str, str] = None, created: float = None):
+        self.serial = serial
+        self.fingerprint = fingerprint
+        self.os_version = os_version
+        self.brand = brand
+        self.resolution = tuple(resolution)
+        self.capabilities = capabilities or {}
+        self.created = created or time.time()
+
+    def to_dict(self) -> dict:
+        return {
+            'serial': self.serial,
+            'fingerprint': self.fingerprint,
+            'os_version': self.os_version,
+            'brand': self.brand,
+            'resolution': list(self.resolution),
+            'capabilities': self.capabilities,
+            'created': self.created,
+        }
+
+    @classmethod
+    def from_dict(cls, d: dict) -> 'DeviceProfile':
+        return cls(**d)
+
+    def __repr__(self):
+        return f'DeviceProfile({self.serial}, {self.brand}, Android {self.os_version}, {self.resolution})'
+
+
+class DeviceProfileCache:
+    """
+    以 设备序列号 + ro.build.fingerprint 为键的设备档案缓存，保存在内存及本地 json 文件中。
+    命中时只需一次读取构建指纹的 shell 调用；指纹变化（如系统升级、刷机）时重新读取设备信息。
+    同一进程内 check_interval 秒内不再重复校验指纹。
+    """
+
+    def __init__(self, path: Optional[str] = DEFAULT_CACHE_PATH, check_interval: float = 300.0):
+        """
+        :param path: 档案文件路径，None 时只缓存在内存中
+        :param check_interval: 同一设备两次校验指纹的最小间隔（秒）
+        """
+        self.path = path
+        self.check_interval = check_interval
+        self.hits = 0
+        self.misses = 0
+        self._profiles = None  # type: Optional[Dict[str, DeviceProfile]]
+        self._checked = {}  # type: Dict[str, float]
+        self._lock = threading.RLock()
+        # 同一设备的读取串行进行，不同设备的 adb 请求在锁外并行
+        self._serial_locks = {}  # type: Dict[str, threading.Lock]
+
+    def _load(self) -> Dict[str, DeviceProfile]:
+        if self._profiles is None:
+            self._profiles = {}
+            if self.path and os.path.exists(self.path):
+                try:
+                    with open(self.path, encoding='utf-8') as f:
+                        for k, v in json.load(f).items():
+                            self._profiles[k] = DeviceProfile.from_dict(v)
+                except (OSError, ValueError, TypeError) as e:
+                    log.warning(f'设备档案文件读取失败，已忽略：{self.path} {e}')
+        return self._profiles
+
+    def _save(self):
+        if not self.path:
+            return
+        data = {k: v.to_dict() for k, v in self._profiles.items() if v.fingerprint}
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            tmp = f'{self.path}.{os.getpid()}.tmp'
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=1)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            log.warning(f'设备档案文件写入失败：{self.path} {e}')
+
+    @staticmethod
+    def get_fingerprint(adb: AdbProxy) -> str:
+        return (adb.run_shell('getprop ro.build.fingerprint') or '').strip()
+
+    @staticmethod
+    def _get_capabilities(adb: AdbProxy) -> Dict[str, str]:
+        out = adb.run_shell(' ; '.join(f'echo "{p}=$(getprop {p})"' for p in CAPABILITY_PROPS)) or ''
+        rs = {}
+        for line in out.splitlines():
+            k, sep, v = line.strip().partition('=')
+            if sep and k in CAPABILITY_PROPS:
+                rs[k] = v
+        return rs
+
+    def _build(self, adb: AdbProxy, serial: str, fingerprint: str) -> DeviceProfile:
+        info = adb.get_device_info()
+        return DeviceProfile(serial, fingerprint, info.os_version, info.brand, adb.get_device_resolution(),
+                             self._get_capabilities(adb))
+
+    def get(self, adb: AdbProxy, serial: str = None) -> DeviceProfile:
+        """
+        获取设备档案，缓存失效时重新读取
+        :param adb:
+        :param serial: 设备序列号，不指定时通过 adb 获取
+        :return:
+        """
+        serial = serial or adb.get_device_serial()
+        with self._lock:
+            serial_lock = self._serial_locks.setdefault(serial, threading.Lock())
+        with serial_lock:
+            with self._lock:
+                p = self._load().get(serial)
+                now = time.monotonic()
+                if p and now - self._checked.get(serial, -self.check_interval) < self.check_interval:
+                    self.hits += 1
+                    return p
+            # adb 请求不占用全局锁，多台设备可并行初始化
+            fingerprint = self.get_fingerprint(adb)
+            if p and fingerprint and p.fingerprint == fingerprint:
+                with self._lock:
+                    self.hits += 1
+                    self._checked[serial] = now
+                return p
+            if p:
+                log.info(f'设备 {serial} 构建指纹变化，重新读取设备信息')
+            p = self._build(adb, serial, fingerprint)
+            with self._lock:
+                self.misses += 1
+                self._load()[serial] = p
+                self._checked[serial] = now
+                if fingerprint:
+                    self._save()
+            return p
+
+    def invalidate(self, serial: str = None):
+        # 清除指定设备（不指定则全部）的档案
+        with self._lock:
+            profiles = self._load()
+            if serial is None:
+                profiles.clear()
+                self._checked.clear()
+            else:
+                profiles.pop(serial, None)
+                self._checked.pop(serial, None)
+            self._save()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'devices': len(self._profiles or {})}
+
+
+default_cache = DeviceProfileCache()
+
+
+def get_device_profile(adb: AdbProxy, serial: str = None, cache: DeviceProfileCache = None) -> DeviceProfile:
+    return (cache or default_cache).get(adb, serial)
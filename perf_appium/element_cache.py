@@ -0,0 +1,79 @@
+import threading
+from typing import Any, Optional
+
+
+class ElementCache:
+    """
+    元素句柄缓存，键为 (by, value, 界面代数)。界面代数在点击、滑动、输入等可能改变界面的操作后递增，
+    同一代数内重复查找同一元素时直接复用服务端返回的元素，省去 find_element 请求（调用方仍需先按界面快照确认元素存在）；
+    只缓存 Appium 服务返回的 WebElement，本地定位的 LocalElement 无需缓存；
+    元素失效（StaleElementReferenceException）时由调用方 drop 后重新查找。
+    """
+
+    def __init__(self, max_size: int = 256, enabled=True):
+        """
+        :param max_size: 同一代数内最多缓存的元素数
+        :param enabled: 是否启用
+        """
+        self.max_size = max_size
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self._generation = None
+        self._items = {}  # type: Dict[Tuple[str, str], Any]
+        self._lock = threading.Lock()
+
+    def _check_generation(self, generation: int):
+        # 代数变化后，之前的元素全部作废
+        if generation != self._generation:
+            self._items.clear()
+            self._generation = generation
+
+    def get(self, by: str, value: str, generation: int) -> Optional[Any]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            self._check_generation(generation)
+            v = self._items.get((by, value))
+            if v is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return v
+
+    def put(self, by: str, value: str, generation: int, element: Any):
+        if not self.enabled or not element:
+            return
+        with self._lock:
+            self._check_generation(generation)
+            if len(self._items) >= self.max_size:
+                self._items.pop(next(iter(self._items)))
+            self._items[(by, value)] = element
+
+    def drop(self, by: str, value: str, stale=False):
+        with self._lock:
+            self._items.pop((by, value), None)
+            if stale:
+                self.stale += 1
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'stale': self.stale,
+                'hit_rate': total and self.hits / total or 0.0,
+                'stale_rate': self.hits and self.stale / self.hits or 0.0,
+            }
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self.stale = 0
@@ -0,0 +1,181 @@
+import time
+import types
+import threading
+from typing import Optional, List
+
+from selenium.common.exceptions import InvalidSessionIdException
+
+from android_perf.base_adb import AdbInterface
+
+from .log import default as log
+
+
+class _Transport:
+    # 单个 adb 通道的状态：各方法的平均耗时、不支持的方法、故障冷却截止时间
+
+    def __init__(self, name: str, adb: AdbInterface):
+        self.name = name
+        self.adb = adb
+        self.latency = {}
+        self.calls = {}
+        self.failures = 0
+        self.unsupported = set()
+        self.down_until = 0.0
+
+    def is_down(self) -> bool:
+        return time.monotonic() < self.down_until
+
+
+class HybridAdb(AdbInterface):
+    """
+    同时持有直连 adb（如 android_perf 的 PureAdb）与 AppiumAdb 两个通道，按各方法的耗时滑动平均把调用路由到更快的通道，
+    某个通道失败时自动切换到另一个；`devices` 等只有部分通道支持的方法，会自动路由到支持的通道。
+    可直接替代原有 adb 通道使用，如：AdbProxy(HybridAdb(PureAdb(...), AppiumAdb(dev)))
+    只有可安全重复执行的方法（IDEMPOTENT）出错后一定会切换通道重试；其余方法（shell 指令、安装、上传等）
+    只在连接层面失败（连接断开/被拒绝、会话不存在）时才切换，其余异常（超时、指令退出码非 0 等）直接抛出，
+    避免同一操作执行两次。
+    """
+    IDEMPOTENT = frozenset({'get_device_serial', 'devices', 'pull_file', 'uninstall_app'})
+    # 通道出错时会抛出异常的同名方法，如 AppiumAdb.run_shell 会把请求失败的信息当作输出返回
+    RAISING_METHODS = {'run_shell': 'run_shell_or_raise'}
+
+    def __init__(self, direct: AdbInterface = None, appium: AdbInterface = None, alpha: float = 0.2,
+                 cooldown: float = 30.0):
+        """
+        :param direct: 直连 adb 通道
+        :param appium: Appium 通道，一般为 AppiumAdb
+        :param alpha: 耗时滑动平均的权重，越大越偏向最近的耗时
+        :param cooldown: 通道出错后暂停使用的秒数
+        """
+        assert direct or appium
+        self.alpha = alpha
+        self.cooldown = cooldown
+        self.transports = [_Transport(n, a) for n, a in (('direct', direct), ('appium', appium)) if a]
+        self._lock = threading.Lock()
+        # 流式输出依赖长连接，直连 adb 优先
+        self._prefer = {'stream_shell': 'direct'}
+
+    def _record(self, t: _Transport, name: str, cost: float):
+        with self._lock:
+            v = t.latency.get(name)
+            t.latency[name] = cost if v is None else v + self.alpha * (cost - v)
+            t.calls[name] = t.calls.get(name, 0) + 1
+
+    def _fail(self, t: _Transport, name: str, e: Exception):
+        with self._lock:
+            t.failures += 1
+            t.down_until = time.monotonic() + self.cooldown
+        log.warning(f'adb 通道 [{t.name}] 执行 `{name}` 失败：{e}')
+
+    @staticmethod
+    def _not_executed(e: Exception) -> bool:
+        # 能确定指令未被执行的错误：连接断开/被拒绝（含 RemoteDisconnected）、会话不存在
+        if isinstance(e, (ConnectionError, InvalidSessionIdException)):
+            return True
+        msg = str(e).lower()
+        return 'connection refused' in msg or 'invalid session id' in msg or 'no such session' in msg
+
+    def _can_failover(self, name: str, e: Exception) -> bool:
+        return name in self.IDEMPOTENT or self._not_executed(e)
+
+    def _method(self, t: _Transport, name: str):
+        alt = self.RAISING_METHODS.get(name)
+        return alt and getattr(t.adb, alt, None) or getattr(t.adb, name)
+
+    def _candidates(self, name: str) -> List[_Transport]:
+        ts = [t for t in self.transports if name not in t.unsupported]
+        prefer = self._prefer.get(name)
+        # 未测量过的通道耗时按 0 计算，保证每个通道都会被尝试；故障冷却中的通道排在最后兜底
+        return sorted(ts, key=lambda t: (t.is_down(), prefer is not None and t.name != prefer, t.latency.get(name, 0)))
+
+    def route(self, name: str) -> Optional[str]:
+        # 当前会被选中的通道名称
+        ts = self._candidates(name)
+        return ts[0].name if ts else None
+
+    def _call(self, name: str, *args, **kwargs):
+        error = None
+        for t in self._candidates(name):
+            start = time.monotonic()
+            try:
+                rs = self._method(t, name)(*args, **kwargs)
+            except NotImplementedError:
+                t.unsupported.add(name)
+                continue
+            except Exception as e:
+                self._fail(t, name, e)
+                if not self._can_failover(name, e):
+                    raise
+                error = e
+                continue
+            self._record(t, name, time.monotonic() - start)
+            return rs
+        if error:
+            raise error
+        raise NotImplementedError(f'No adb transport support for `{name}`')
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {t.name: {
+                'latency': dict(t.latency),
+                'calls': dict(t.calls),
+                'failures': t.failures,
+                'unsupported': sorted(t.unsupported),
+                'down': t.is_down(),
+            } for t in self.transports}
+
+    def run_shell(self, cmd: str, clean_wrap=False) -> str:
+        return self._call('run_shell', cmd, clean_wrap)
+
+    def stream_shell(self, cmd: str) -> types.GeneratorType:
+        # 生成器在首次读取时才会真正执行，这里需要提前取出首行来确认通道可用
+        error = None
+        for t in self._candidates('stream_shell'):
+            try:
+                g = t.adb.stream_shell(cmd)
+                first = next(g, None)
+            except NotImplementedError:
+                t.unsupported.add('stream_shell')
+                continue
+            except Exception as e:
+                self._fail(t, 'stream_shell', e)
+                if not self._can_failover('stream_shell', e):
+                    raise
+                error = e
+                continue
+            return self._chain(first, g)
+        if error:
+            raise error
+        raise NotImplementedError('No adb transport support for `stream shell`')
+
+    @staticmethod
+    def _chain(first, g) -> types.GeneratorType:
+        if first is None:
+            return
+        yield first
+        yield from g
+
+    def close(self):
+        for t in self.transports:
+            try:
+                t.adb.close()
+            except Exception as e:
+                log.warning(f'关闭 adb 通道 [{t.name}] 失败：{e}')
+
+    def install_app(self, apk_path):
+        return self._call('install_app', apk_path)
+
+    def uninstall_app(self, app_bundle: str):
+        return self._call('uninstall_app', app_bundle)
+
+    def push_file(self, local_path: str, device_path: str):
+        return self._call('push_file', local_path, device_path)
+
+    def pull_file(self, device_path: str, local_path: str):
+        return self._call('pull_file', device_path, local_path)
+
+    def get_device_serial(self) -> str:
+        return self._call('get_device_serial')
+
+    def devices(self):
+        return self._call('devices')
@@ -0,0 +1,129 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+from android_perf.base_adb import AdbProxy
+
+from .apk import ApkInfo, get_apk_info
+from .log import default as log
+
+
+class InstallResult:
+    # 单台设备的安装结果及耗时
+    __slots__ = ('serial', 'package', 'installed', 'skip_reason', 'version_before', 'elapsed', 'error')
+
+    def __init__(self, serial: str, package: str):
+        self.serial = serial
+        self.package = package
+        self.installed = False
+        self.skip_reason = None  # type: Optional[str]
+        self.version_before = None  # type: Optional[str]
+        self.elapsed = 0.0
+        self.error = None  # type: Optional[BaseException]
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def __repr__(self):
+        state = 'error' if self.error else 'installed' if self.installed else 'skipped'
+        return f'<InstallResult {self.serial} {self.package} {state} elapsed={self.elapsed:.2f}s>'
+
+
+class InstallManager:
+    """
+    APK 安装管理：APK 的包名、版本及哈希只读取一次；设备上已安装相同版本（及相同哈希）时跳过安装；
+    多台设备并行安装，并统计每台设备的耗时。安装成功后在设备上记录 APK 的哈希，用于识别同版本号的不同构建。
+    如：
+        results = InstallManager().install('app.apk', {serial: adb for serial, adb in ...})
+    """
+    MARKER_DIR = '/data/local/tmp/perf_appium'
+
+    def __init__(self, max_workers: int = 8, check_hash=True):
+        """
+        :param max_workers: 同时安装的设备数
+        :param check_hash: 版本相同时是否还需比较 APK 哈希，为否则只比较版本
+        """
+        self.max_workers = max_workers
+        self.check_hash = check_hash
+
+    def _marker(self, pkg: str) -> str:
+        return f'{self.MARKER_DIR}/{pkg}.sha256'
+
+    @staticmethod
+    def get_installed_version(adb: AdbProxy, pkg: str) -> Optional[str]:
+        try:
+            return (adb.get_app_version(pkg) or '').strip() or None
+        except Exception as e:
+            log.debug(f'get_app_version {pkg} failed: {e}')
+            return None
+
+    def check(self, adb: AdbProxy, info: ApkInfo, result: InstallResult = None) -> Optional[str]:
+        """
+        判断设备上是否已安装该 APK
+        :return: 无需安装的原因，需要安装则返回 None
+        """
+        version = self.get_installed_version(adb, info.package)
+        if result:
+            result.version_before = version
+        if not version:
+            return None
+        if info.version_name and version != info.version_name:
+            return None
+        if self.check_hash:
+            h = (adb.run_shell(f'cat {self._marker(info.package)} 2>/dev/null') or '').strip()
+            if h != info.sha256:
+                return None
+        return f'{info.package} {version} already installed'
+
+    def install_one(self, adb: AdbProxy, apk: str, force=False, serial: str = None,
+                    installer: Callable[[str], object] = None) -> InstallResult:
+        """
+        在单台设备上安装 APK，已是最新时跳过
+        :param adb: 用于检查版本及记录哈希
+        :param apk: APK 文件路径
+        :param force: 是否跳过检查，强制安装
+        :param serial: 设备序列号，仅用于结果及日志，为空则通过 adb 获取
+        :param installer: 执行安装的函数，默认 adb.install_app；有界面时应传入 ui.install_app，以便设备适配类处理安装确认
+        :return: InstallResult，安装失败时记录在 error 中，不抛出异常
+        """
+        info = get_apk_info(apk)
+        rs = InstallResult(serial or adb.get_device_serial(), info.package)
+        start = time.monotonic()
+        try:
+            rs.skip_reason = None if force else self.check(adb, info, rs)
+            if rs.skip_reason is None:
+                (installer or adb.install_app)(info.path)
+                adb.run_shell(f'mkdir -p {self.MARKER_DIR} && echo {info.sha256} > {self._marker(info.package)}')
+                rs.installed = True
+        except Exception as e:
+            rs.error = e
+            log.error(f'[{rs.serial}] 安装 {info.package} 失败：{e}')
+        rs.elapsed = time.monotonic() - start
+        log.info(f'[{rs.serial}] {rs}')
+        return rs
+
+    def install(self, apk: str, adbs: Dict[str, AdbProxy], force=False,
+                installers: Dict[str, Callable[[str], object]] = None) -> Dict[str, InstallResult]:
+        """
+        在多台设备上并行安装 APK
+        :param apk: APK 文件路径
+        :param adbs: {设备序列号: AdbProxy}
+        :param force: 是否强制安装
+        :param installers: {设备序列号: 执行安装的函数}，详见 install_one 的 installer
+        :return: {设备序列号: InstallResult}
+        """
+        installers = installers or {}
+        info = get_apk_info(apk)
+        log.info(f'安装 {info} 到 {len(adbs)} 台设备')
+        start = time.monotonic()
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(adbs))),
+                                thread_name_prefix='perf-appium-install') as executor:
+            futures = {s: executor.submit(self.install_one, adb, apk, force, s, installers.get(s))
+                       for s, adb in adbs.items()}
+            results = {s: f.result() for s, f in futures.items()}
+        installed = sum(r.installed for r in results.values())
+        failed = sum(not r.ok for r in results.values())
+        log.info(f'安装完成：{installed} 台安装，{len(results) - installed - failed} 台跳过，{failed} 台失败，'
+                 f'耗时 {time.monotonic() - start:.2f}s')
+        return results
@@ -0,0 +1,230 @@
+import re
+import json
+import time
+import zlib
+import queue
+import struct
+import hashlib
+import difflib
+import threading
+from typing import Iterator, List, Tuple
+
+from .log import default as log
+
+# 记录类型：完整内容、相对上一条的差异、与之前某条内容相同
+KEYFRAME = 'key'
+DIFF = 'diff'
+REF = 'ref'
+
+_HEAD = struct.Struct('>I')
+_TOKEN_RE = re.compile(r'[^>]*>|[^>]+$')
+
+
+def _tokens(source: str) -> List[str]:
+    # 按标签切分，单行输出的 page_source 也能得到有效的差异
+    return _TOKEN_RE.findall(source)
+
+
+def make_diff(prev: List[str], cur: List[str]) -> list:
+    # 只保存不相同的片段：[[i1, i2, [替换内容...]], ...]，i1/i2 为上一条内容中的位置
+    sm = difflib.SequenceMatcher(None, prev, cur, autojunk=False)
+    return [[i1, i2, cur[j1:j2]] for tag, i1, i2, j1, j2 in sm.get_opcodes() if tag != 'equal']
+
+
+def apply_diff(prev: List[str], ops: list) -> List[str]:
+    rs = []
+    pos = 0
+    for i1, i2, tokens in ops:
+        rs.extend(prev[pos:i1])
+        rs.extend(tokens)
+        pos = i2
+    rs.extend(prev[pos:])
+    return rs
+
+
+class SnapshotJournal:
+    """
+    界面结构日志：记录每次从 Appium 服务获取到的 page_source，内容相同的只记录引用，
+    其余按相对上一条的差异（每 keyframe_interval 条保存一次完整内容）经 zlib 压缩后追加写入文件。
+    压缩与写入在后台线程中进行，调用方不会被阻塞；队列满时丢弃并计数。
+    文件格式：每条记录为 4 字节头部长度 + json 头部 + 压缩内容，使用 JournalReader 读取。
+    """
+
+    def __init__(self, path: str, keyframe_interval: int = 50, max_queue: int = 1000, level: int = 6):
+        """
+        :param path: 日志文件，已存在时追加
+        :param keyframe_interval: 每隔多少条差异记录保存一次完整内容
+        :param max_queue: 待写入队列的最大长度
+        :param level: zlib 压缩级别
+        """
+        self.path = path
+        self.keyframe_interval = keyframe_interval
+        self.level = level
+        self.dropped = 0
+        self.records = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self._queue = queue.Queue(max_queue)
+        self._index = JournalReader.count(path)
+        self._hashes = {}  # type: Dict[str, int]
+        self._prev = None  # type: Optional[List[str]]
+        self._since_key = 0
+        self._f = open(path, 'ab')
+        self._thread = threading.Thread(target=self._run, name='snapshot-journal', daemon=True)
+        self._thread.start()
+
+    def record(self, source: str, label: str = ''):
+        """提交一份界面结构，立即返回"""
+        try:
+            self._queue.put_nowait((time.time(), source, label))
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                self._write(*item)
+            except Exception as e:
+                log.warning(f'界面结构日志写入失败：{e}')
+            finally:
+                self._queue.task_done()
+
+    def _write(self, ts: float, source: str, label: str):
+        data = source.encode('utf-8')
+        h = hashlib.sha1(data).hexdigest()
+        head = {'i': self._index, 't': round(ts, 3), 'l': label, 'h': h}
+        payload = b''
+        ref = self._hashes.get(h)
+        tokens = _tokens(source)
+        if ref is not None:
+            head['k'] = REF
+            head['r'] = ref
+        elif self._prev is None or self._since_key >= self.keyframe_interval:
+            head['k'] = KEYFRAME
+            payload = zlib.compress(data, self.level)
+        else:
+            diff = json.dumps(make_diff(self._prev, tokens), ensure_ascii=False, separators=(',', ':'))
+            payload = zlib.compress(diff.encode('utf-8'), self.level)
+            head['k'] = DIFF
+            if len(payload) > len(data) // 10:
+                # 差异较大时，完整内容更小则直接保存完整内容
+                full = zlib.compress(data, self.level)
+                if len(full) <= len(payload):
+                    head['k'] = KEYFRAME
+                    payload = full
+        self._since_key = 0 if head['k'] == KEYFRAME else self._since_key + 1
+        self._hashes.setdefault(h, self._index)
+        self._prev = tokens
+        head['n'] = len(payload)
+        hb = json.dumps(head, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        self._f.write(_HEAD.pack(len(hb)) + hb + payload)
+        self._f.flush()
+        self._index += 1
+        self.records += 1
+        self.bytes_in += len(data)
+        self.bytes_out += _HEAD.size + len(hb) + len(payload)
+
+    def flush(self):
+        # 等待队列中的记录全部写入
+        self._queue.join()
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        self._f.close()
+
+    def stats(self) -> dict:
+        return {
+            'records': self.records,
+            'dropped': self.dropped,
+            'pending': self._queue.qsize(),
+            'bytes_in': self.bytes_in,
+            'bytes_out': self.bytes_out,
+            'ratio': self.bytes_in and round(self.bytes_out / self.bytes_in, 4) or 0.0,
+        }
+
+
+class JournalReader:
+    """
+    读取 SnapshotJournal 写入的文件，可还原任一条记录时的界面结构：
+        r = JournalReader('run.journal')
+        for head in r.entries(): print(head['i'], head['l'])
+        print(r.get(len(r) - 1))
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._entries = []  # type: List[Tuple[dict, int]]
+        self._cache = None  # type: Optional[Tuple[int, List[str]]]
+        with open(path, 'rb') as f:
+            for head, offset in self._scan(f):
+                self._entries.append((head, offset))
+
+    @staticmethod
+    def _scan(f) -> Iterator[Tuple[dict, int]]:
+        while True:
+            b = f.read(_HEAD.size)
+            if len(b) < _HEAD.size:
+                return
+            hb = f.read(_HEAD.unpack(b)[0])
+            try:
+                head = json.loads(hb)
+            except ValueError:
+                # 写入中断导致的不完整记录
+                return
+            offset = f.tell()
+            f.seek(head['n'], 1)
+            yield head, offset
+
+    @classmethod
+    def count(cls, path: str) -> int:
+        try:
+            with open(path, 'rb') as f:
+                return sum(1 for _ in cls._scan(f))
+        except FileNotFoundError:
+            return 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def entries(self) -> List[dict]:
+        return [h for h, _ in self._entries]
+
+    def _payload(self, f, i: int) -> bytes:
+        head, offset = self._entries[i]
+        f.seek(offset)
+        return zlib.decompress(f.read(head['n']))
+
+    def _tokens(self, f, i: int) -> List[str]:
+        if self._cache and self._cache[0] == i:
+            return self._cache[1]
+        head = self._entries[i][0]
+        if head['k'] == REF:
+            tokens = self._tokens(f, head['r'])
+        elif head['k'] == KEYFRAME:
+            tokens = _tokens(self._payload(f, i).decode('utf-8'))
+        else:
+            # 向前找到最近的完整内容（或上次还原的记录），依次应用差异
+            base = i - 1
+            while self._entries[base][0]['k'] == DIFF and not (self._cache and self._cache[0] == base):
+                base -= 1
+            tokens = self._tokens(f, base)
+            for j in range(base + 1, i + 1):
+                tokens = apply_diff(tokens, json.loads(self._payload(f, j)))
+        self._cache = (i, tokens)
+        return tokens
+
+    def get(self, i: int) -> str:
+        """还原第 i 条记录（支持负数下标）的界面结构"""
+        if i < 0:
+            i += len(self._entries)
+        with open(self.path, 'rb') as f:
+            return ''.join(self._tokens(f, i))
+
+    def find(self, label: str) -> List[int]:
+        # 标签包含指定内容的记录序号
+        return [h['i'] for h, _ in self._entries if label in h.get('l', '')]
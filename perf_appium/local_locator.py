@@ -0,0 +1,180 @@
+import re
+from typing import Dict, List, Optional, Tuple
+from xml.etree import ElementTree
+
+# 与 AppiumBy 中的取值保持一致，这里不直接引用 appium，便于单独使用
+BY_ID = 'id'
+BY_XPATH = 'xpath'
+BY_ACCESSIBILITY_ID = 'accessibility id'
+BY_CLASS_NAME = 'class name'
+
+INDEX_KEYS = ('resource-id', 'text', 'content-desc', 'class')
+
+_BOUNDS_RE = re.compile(r'\[(-?\d+),(-?\d+)\]\[(-?\d+),(-?\d+)\]')
+# 仅支持 mk_xpath 构建的两种形式：//tag[@key="value"] 与 //tag[contains(@key,"value")]
+_XPATH_RE = re.compile(r'^//([\w.$*]+)\[(?:@([\w-]+)="([^"]*)"|contains\(@([\w-]+),\s*"([^"]*)"\))\]$')
+
+
+def parse_bounds(bounds: str) -> Tuple[int, int, int, int]:
+    m = _BOUNDS_RE.match(bounds or '')
+    if not m:
+        return 0, 0, 0, 0
+    return tuple(int(i) for i in m.groups())
+
+
+def mk_xpath(value: str, view_tag=None, key=None, is_contains=False) -> str:
+    """
+    构建xpath
+    :param value: 值
+    :param view_tag: 标签，默认*
+    :param key: text, content-desc, class. 默认：content-desc
+    :param is_contains: 是否模糊匹配，默认否
+    :return:
+    """
+    view_tag = view_tag or '*'
+    key = key or "content-desc"
+    if is_contains:
+        return f'//{view_tag}[contains(@{key},"{value}")]'
+    return f'//{view_tag}[@{key}="{value}"]'
+
+
+def parse_xpath(xpath: str) -> Optional[Tuple[str, str, str, bool]]:
+    """
+    解析 mk_xpath 生成的 xpath
+    :param xpath:
+    :return: (view_tag, key, value, is_contains)，不支持的形式返回 None
+    """
+    m = _XPATH_RE.match(xpath.strip())
+    if not m:
+        return None
+    tag, key, value, c_key, c_value = m.groups()
+    if key:
+        return tag, key, value, False
+    return tag, c_key, c_value, True
+
+
+class LocalElement:
+    # 本地解析出来的轻量元素记录，只保存属性与坐标，点击等操作直接按坐标执行，不再请求 Appium 服务
+    __slots__ = ('tag', 'attrib', 'bounds', '_device')
+
+    def __init__(self, tag: str, attrib: Dict[str, str], device=None):
+        self.tag = tag
+        self.attrib = attrib
+        self.bounds = parse_bounds(attrib.get('bounds'))
+        self._device = device
+
+    def __repr__(self):
+        return f'<LocalElement {self.tag} id={self.resource_id!r} text={self.text!r} bounds={self.bounds}>'
+
+    def get_attribute(self, name: str) -> Optional[str]:
+        return self.attrib.get(name)
+
+    @property
+    def text(self) -> str:
+        return self.attrib.get('text', '')
+
+    @property
+    def resource_id(self) -> str:
+        return self.attrib.get('resource-id', '')
+
+    @property
+    def content_desc(self) -> str:
+        return self.attrib.get('content-desc', '')
+
+    @property
+    def class_name(self) -> str:
+        return self.attrib.get('class', self.tag)
+
+    @property
+    def location(self) -> Dict[str, int]:
+        return {'x': self.bounds[0], 'y': self.bounds[1]}
+
+    @property
+    def size(self) -> Dict[str, int]:
+        return {'width': self.bounds[2] - self.bounds[0], 'height': self.bounds[3] - self.bounds[1]}
+
+    @property
+    def rect(self) -> Dict[str, int]:
+        rs = self.location
+        rs.update(self.size)
+        return rs
+
+    @property
+    def center(self) -> Tuple[int, int]:
+        x0, y0, x1, y1 = self.bounds
+        return (x0 + x1) // 2, (y0 + y1) // 2
+
+    def is_displayed(self) -> bool:
+        return self.attrib.get('displayed', 'true') == 'true'
+
+    def is_enabled(self) -> bool:
+        return self.attrib.get('enabled', 'true') == 'true'
+
+    def click(self):
+        if self._device is None:
+            raise RuntimeError('LocalElement 未绑定设备，无法点击')
+        x, y = self.center
+        return self._device.tap(x, y)
+
+
+class LocalHierarchy:
+    # 将 page_source 一次性解析为内存中的元素列表，并按 resource-id/text/content-desc/class 建立索引
+
+    def __init__(self, source: str, device=None):
+        self.source = source
+        self.elements = []  # type: List[LocalElement]
+        self._index = {k: {} for k in INDEX_KEYS}  # type: Dict[str, Dict[str, List[LocalElement]]]
+        self._short_id_index = {}  # type: Dict[str, List[LocalElement]]
+        root = ElementTree.fromstring(source.encode('utf-8') if isinstance(source, str) else source)
+        for node in root.iter():
+            if node is root and node.tag == 'hierarchy':
+                continue
+            el = LocalElement(node.tag, node.attrib, device)
+            self.elements.append(el)
+            for k in INDEX_KEYS:
+                v = node.attrib.get(k)
+                if v:
+                    self._index[k].setdefault(v, []).append(el)
+            rid = node.attrib.get('resource-id')
+            if rid and ':id/' in rid:
+                self._short_id_index.setdefault(rid.split(':id/', 1)[1], []).append(el)
+
+    def find_by_attribute(self, key: str, value: str, view_tag: str = None, is_contains=False) -> List[LocalElement]:
+        if is_contains:
+            # 模糊匹配按文档顺序扫描，与服务端 xpath 的结果顺序一致
+            rs = [e for e in self.elements if value in e.attrib.get(key, '')]
+        elif key in self._index:
+            rs = self._index[key].get(value, [])
+        else:
+            rs = [e for e in self.elements if e.attrib.get(key) == value]
+        if view_tag and view_tag != '*':
+            rs = [e for e in rs if e.tag == view_tag or e.attrib.get('class') == view_tag]
+        return list(rs)
+
+    def find_by_id(self, value: str) -> List[LocalElement]:
+        if ':id/' in value:
+            return list(self._index['resource-id'].get(value, []))
+        # 与 UiAutomator2 一致，未带包名的 id 按短 id 匹配
+        return list(self._short_id_index.get(value, []))
+
+    def find_all(self, value: str, by: str = None) -> Optional[List[LocalElement]]:
+        """
+        本地查找元素
+        :param value: 资源值
+        :param by: 查找方式，支持 id, xpath(仅 mk_xpath 形式), accessibility id, class name
+        :return: 匹配的元素列表；不支持本地解析的查找方式返回 None，由调用方回退到服务端查找
+        """
+        by = by or BY_ID
+        if by == BY_ID:
+            return self.find_by_id(value)
+        if by == BY_ACCESSIBILITY_ID:
+            return self.find_by_attribute('content-desc', value)
+        if by == BY_CLASS_NAME:
+            return self.find_by_attribute('class', value)
+        if by == BY_XPATH:
+            rs = parse_xpath(value)
+            if rs is None:
+                return None
+            view_tag, key, v, is_contains = rs
+            return self.find_by_attribute(key, v, view_tag, is_contains)
+        return None
@@ -0,0 +1,247 @@
+import json
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+from typing import Dict, List
+
+from .log import default as log
+
+# 直方图桶上限（秒）
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, float('inf'))
+
+# 耗时分类
+APPIUM = 'appium'
+ADB = 'adb'
+SLEEP = 'sleep'
+
+
+class Histogram:
+    __slots__ = ('counts', 'count', 'sum', 'min', 'max')
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+        self.min = float('inf')
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        if seconds < self.min:
+            self.min = seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q: float) -> float:
+        # 按桶估算分位数，返回所在桶的上限
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        n = 0
+        for i, c in enumerate(self.counts):
+            n += c
+            if n >= target:
+                return min(BUCKETS[i], self.max)
+        return self.max
+
+    def to_dict(self) -> dict:
+        return {
+            'count': self.count,
+            'sum_ms': round(self.sum * 1000, 3),
+            'avg_ms': round(self.count and self.sum / self.count * 1000, 3),
+            'min_ms': round(self.count and self.min * 1000, 3),
+            'max_ms': round(self.max * 1000, 3),
+            'p90_ms': round(self.quantile(0.9) * 1000, 3),
+        }
+
+
+class MetricsSink:
+    # 指标输出接口：emit 接收单次调用记录，flush 接收汇总后的 Metrics
+
+    def emit(self, event: dict):
+        pass
+
+    def flush(self, metrics: 'Metrics'):
+        pass
+
+    def close(self):
+        pass
+
+
+class MemorySink(MetricsSink):
+    # 在内存中保留最近的汇总结果
+
+    def __init__(self):
+        self.summary = {}
+
+    def flush(self, metrics: 'Metrics'):
+        self.summary = metrics.summary()
+
+
+class JsonLinesSink(MetricsSink):
+    # 每次调用写一行 json 到 trace 文件
+
+    def __init__(self, path: str):
+        self.path = path
+        self._f = open(path, 'a', encoding='utf-8')
+        self._lock = threading.Lock()
+
+    def emit(self, event: dict):
+        line = json.dumps(event, ensure_ascii=False)
+        with self._lock:
+            self._f.write(line + '\n')
+
+    def flush(self, metrics: 'Metrics'):
+        with self._lock:
+            self._f.flush()
+
+    def close(self):
+        with self._lock:
+            self._f.close()
+
+
+def _label(v: str) -> str:
+    return v.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class PrometheusSink(MetricsSink):
+    # flush 时以 Prometheus 文本格式覆盖写入文件，可配合 node_exporter 的 textfile collector 使用
+
+    def __init__(self, path: str, name: str = 'perf_appium_call_seconds', with_locator=False):
+        """
+        :param path: 输出文件
+        :param name: 指标名称
+        :param with_locator: 是否按定位符输出（序列数量会随定位符增加）
+        """
+        self.path = path
+        self.name = name
+        self.with_locator = with_locator
+
+    def _series(self, labels: str, h: Histogram) -> List[str]:
+        rs = []
+        n = 0
+        for le, c in zip(BUCKETS, h.counts):
+            n += c
+            rs.append(f'{self.name}_bucket{{{labels},le="{"+Inf" if le == float("inf") else le}"}} {n}')
+        rs.append(f'{self.name}_sum{{{labels}}} {h.sum}')
+        rs.append(f'{self.name}_count{{{labels}}} {h.count}')
+        return rs
+
+    def flush(self, metrics: 'Metrics'):
+        lines = [f'# HELP {self.name} perf-appium round-trip latency', f'# TYPE {self.name} histogram']
+        with metrics.lock:
+            for (category, method), h in sorted(metrics.methods.items()):
+                lines.extend(self._series(f'category="{_label(category)}",method="{_label(method)}"', h))
+            if self.with_locator:
+                for (category, method, locator), h in sorted(metrics.locators.items()):
+                    lines.extend(self._series(
+                        f'category="{_label(category)}",method="{_label(method)}",locator="{_label(locator)}"', h))
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+
+
+class Metrics:
+    """
+    记录每次 Appium/adb 往返及等待的耗时，按 (分类, 方法) 及 (分类, 方法, 定位符) 汇总为直方图，
+    并可输出到多个 sink。
+    """
+
+    def __init__(self, sinks: List[MetricsSink] = None, enabled=True):
+        self.sinks = list(sinks or [])
+        self.enabled = enabled
+        self.methods = {}  # type: Dict[Tuple[str, str], Histogram]
+        self.locators = {}  # type: Dict[Tuple[str, str, str], Histogram]
+        self.totals = {}  # type: Dict[str, float]
+        self.lock = threading.Lock()
+
+    def add_sink(self, sink: MetricsSink):
+        self.sinks.append(sink)
+
+    def observe(self, category: str, method: str, seconds: float, locator: str = None, error: str = None):
+        if not self.enabled:
+            return
+        with self.lock:
+            h = self.methods.get((category, method))
+            if h is None:
+                h = self.methods[(category, method)] = Histogram()
+            h.observe(seconds)
+            if locator is not None:
+                k = (category, method, locator)
+                h = self.locators.get(k)
+                if h is None:
+                    h = self.locators[k] = Histogram()
+                h.observe(seconds)
+            self.totals[category] = self.totals.get(category, 0.0) + seconds
+        if self.sinks:
+            event = {'ts': time.time(), 'category': category, 'method': method, 'ms': round(seconds * 1000, 3)}
+            if locator is not None:
+                event['locator'] = locator
+            if error:
+                event['error'] = error
+            for s in self.sinks:
+                s.emit(event)
+
+    @contextmanager
+    def timed(self, category: str, method: str, locator: str = None):
+        start = time.perf_counter()
+        error = None
+        try:
+            yield
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            self.observe(category, method, time.perf_counter() - start, locator, error)
+
+    def get_totals(self) -> Dict[str, float]:
+        with self.lock:
+            return dict(self.totals)
+
+    @contextmanager
+    def step(self, name: str, budget: Dict[str, float] = None):
+        """
+        统计一个测试步骤内各分类的耗时，结束时输出 "X ms appium, Y ms adb, Z ms sleep"
+        :param name: 步骤名称
+        :param budget: 各分类的耗时预算（毫秒），超出时输出警告
+        :return: 生成的字典在步骤结束后填入各分类耗时（毫秒）
+        """
+        before = self.get_totals()
+        rs = {}
+        try:
+            yield rs
+        finally:
+            after = self.get_totals()
+            for k in set(before) | set(after):
+                rs[k] = round((after.get(k, 0.0) - before.get(k, 0.0)) * 1000, 3)
+            log.info(f'[{name}] ' + ', '.join(f'{rs.get(k, 0.0)} ms {k}' for k in sorted(set(rs) | {APPIUM, ADB, SLEEP})))
+            for k, v in (budget or {}).items():
+                if rs.get(k, 0.0) > v:
+                    log.warning(f'[{name}] {k} 耗时 {rs[k]} ms 超出预算 {v} ms')
+
+    def summary(self, with_locator=False) -> dict:
+        with self.lock:
+            rs = {
+                'totals_ms': {k: round(v * 1000, 3) for k, v in self.totals.items()},
+                'methods': {f'{c}.{m}': h.to_dict() for (c, m), h in self.methods.items()},
+            }
+            if with_locator:
+                rs['locators'] = {f'{c}.{m}[{l}]': h.to_dict() for (c, m, l), h in self.locators.items()}
+        return rs
+
+    def flush(self):
+        for s in self.sinks:
+            s.flush(self)
+
+    def reset(self):
+        with self.lock:
+            self.methods.clear()
+            self.locators.clear()
+            self.totals.clear()
+
+    def close(self):
+        self.flush()
+        for s in self.sinks:
+            s.close()
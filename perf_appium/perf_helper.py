@@ -1,23 +1,47 @@
 import abc
+from typing import List, Optional
 
 from android_perf.perf_helper import AndroidPerfBaseHelper as _AndroidPerfBaseHelper
 from android_perf.perf_helper import AndroidPerfBaseHelperWithWhistle as _AndroidPerfBaseHelperWithWhistle
 
 from .ui_helper import AndroidBaseUI
 from .log import default as logging
+from .timeline import UITimeline
 
 
 class AndroidPerfBaseHelper(_AndroidPerfBaseHelper, metaclass=abc.ABCMeta):
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # 采样回调的唯一入口：实例属性优先于类中定义的方法，采样只记录一次，
+        # 子类实现中通过 super() 调用父类实现时不会经过这里
+        self.on_test_cpu_memory = self._on_cpu_memory_sample
+
+    def _on_cpu_memory_sample(self, current_second: int, max_listen_seconds: int, data: dict):
+        # 性能采样写入界面操作时间线后再交给子类处理
+        self.timeline.record_sample('cpu_memory', data, current_second)
+        return type(self).on_test_cpu_memory(self, current_second, max_listen_seconds, data)
+
     @property
     @abc.abstractmethod
     def ui(self) -> AndroidBaseUI:
         raise NotImplementedError
 
+    @property
+    def timeline(self) -> UITimeline:
+        return self.ui.dev.timeline
+
+    def export_timeline(self, path: Optional[str] = None) -> List[dict]:
+        """
+        导出界面操作与 CPU/内存采样合并后的时间线，详见 UITimeline.export
+        :param path: 指定则每条记录写一行 json 到该文件
+        """
+        return self.timeline.export(path)
+
     def close_all_app(self):
         logging.info('关闭所有App！')
         self.ui.home()
-        self.ui.sleep(1)
+        self.ui.wait_until_idle(timeout=3, by_window=True)
         self.ui.close_all_app()
 
     def apply_screen_record_permission(self) -> bool:
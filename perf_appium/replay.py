@@ -0,0 +1,279 @@
+import json
+import time
+import hashlib
+from typing import Any, Dict, List, Optional, Tuple
+
+from .local_locator import LocalHierarchy, LocalElement
+from .log import default as log
+
+TRACE_VERSION = 1
+
+
+def screen_signature(source: str) -> str:
+    """
+    界面签名：只取各节点的 class 与 resource-id 组成的集合，忽略文本、坐标等易变内容，
+    同一界面在列表滚动、文本刷新后签名保持不变
+    """
+    h = LocalHierarchy(source)
+    keys = sorted({f'{e.class_name}|{e.resource_id}' for e in h.elements})
+    return hashlib.sha1('\n'.join(keys).encode('utf-8')).hexdigest()[:16]
+
+
+def element_bounds(v) -> Optional[List[int]]:
+    # 元素的 [x0, y0, x1, y1]，LocalElement 直接取解析结果，WebElement 需请求一次 rect
+    if isinstance(v, LocalElement):
+        return list(v.bounds)
+    try:
+        r = v.rect
+    except Exception:
+        return None
+    return [r['x'], r['y'], r['x'] + r['width'], r['y'] + r['height']]
+
+
+class Trace:
+    """
+    坐标级操作轨迹，以 json lines 保存：首行为头部（版本、分辨率），之后每行一个步骤，字段：
+        a: 动作 click/tap/swipe/input/sleep/go_back/home/check
+        r, by: 元素定位（click）
+        b: 元素坐标 [x0, y0, x1, y1]（click）；p: 坐标参数（tap/swipe）
+        s: 动作前的界面签名；c: 为 1 时回放时校验签名
+        t: 相对录制开始的秒数；d: 动作耗时秒数
+    """
+
+    def __init__(self, resolution: Tuple[int, int], steps: List[Dict[str, Any]] = None, meta: dict = None):
+        self.resolution = tuple(resolution)
+        self.steps = steps or []
+        self.meta = meta or {}
+
+    def save(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            head = {'v': TRACE_VERSION, 'resolution': list(self.resolution), 'meta': self.meta}
+            f.write(json.dumps(head, ensure_ascii=False, separators=(',', ':')) + '\n')
+            for s in self.steps:
+                f.write(json.dumps(s, ensure_ascii=False, separators=(',', ':')) + '\n')
+
+    @classmethod
+    def load(cls, path: str) -> 'Trace':
+        with open(path, encoding='utf-8') as f:
+            head = json.loads(f.readline())
+            if head.get('v') != TRACE_VERSION:
+                raise ValueError(f'不支持的轨迹版本：{head.get("v")}')
+            return cls(head['resolution'], [json.loads(line) for line in f if line.strip()], head.get('meta'))
+
+    def __len__(self):
+        return len(self.steps)
+
+
+# 按原参数录制、回放时原样调用的操作
+CALL_ACTIONS = ('launch_app', 'kill_app', 'task_manager', 'open_app_market', 'scroll_to', 'clear_app')
+# 会改变界面但无法录制的操作（设备适配类中的界面流程），录制时拒绝调用
+UNSUPPORTED_ACTIONS = ('close_all_app', 'upgrade_app', 'permission_')
+
+
+class UIRecorder:
+    """
+    包装 BaseUI 录制操作轨迹，CALL_ACTIONS 中的操作按原参数录制，UNSUPPORTED_ACTIONS 中的操作拒绝调用，
+    其余未录制的方法（查找、判断等不改变界面的操作）直接转发给被包装的 UI 对象：
+        rec = UIRecorder(ui)
+        rec.click(LoginPage.SUBMIT_ID)
+        rec.checkpoint('home')
+        rec.trace.save('login.trace')
+    """
+
+    def __init__(self, ui, checkpoint_every: int = 5, meta: dict = None):
+        """
+        :param ui: BaseUI
+        :param checkpoint_every: 每隔多少次点击标记一次签名校验点，0 为只使用 checkpoint() 标记的校验点
+        :param meta: 写入轨迹头部的附加信息
+        """
+        self.ui = ui
+        self.checkpoint_every = checkpoint_every
+        self.trace = Trace(ui.get_device_resolution(), meta=meta)
+        self._start = time.monotonic()
+        self._clicks = 0
+
+    def __getattr__(self, item):
+        if item in CALL_ACTIONS:
+            return lambda *args, **kwargs: self._call(item, args, kwargs)
+        if item.startswith(UNSUPPORTED_ACTIONS):
+            raise NotImplementedError(f'`{item}` 无法录制，请在录制前后单独执行')
+        return getattr(self.ui, item)
+
+    def _call(self, name: str, args: tuple, kwargs: dict):
+        start = time.monotonic()
+        rs = getattr(self.ui, name)(*args, **kwargs)
+        step = {'a': name}
+        if args:
+            step['args'] = list(args)
+        if kwargs:
+            step['kw'] = kwargs
+        self._add(step, start)
+        return rs
+
+    def _signature(self) -> str:
+        return screen_signature(self.ui.dev.get_page_source())
+
+    def _add(self, step: dict, start: float) -> dict:
+        step['t'] = round(start - self._start, 3)
+        step['d'] = round(time.monotonic() - start, 3)
+        self.trace.steps.append(step)
+        return step
+
+    def click(self, resource: str, by: str = None, on_exists=False, timeout: float = None):
+        start = time.monotonic()
+        v = self.ui.exist(resource, by, timeout)
+        if not v:
+            return self.ui.click(resource, by, on_exists)
+        step = {'a': 'click', 'r': resource, 'by': by, 'b': element_bounds(v), 's': self._signature()}
+        self._clicks += 1
+        if self.checkpoint_every and (self._clicks - 1) % self.checkpoint_every == 0:
+            step['c'] = 1
+        # 元素已找到，快照仍然有效，不会重复请求界面
+        rs = self.ui.click(resource, by, on_exists, timeout)
+        self._add(step, start)
+        return rs
+
+    def checkpoint(self, label: str = ''):
+        # 记录当前界面签名，回放到这里时等待界面一致后再继续
+        start = time.monotonic()
+        self._add({'a': 'check', 'l': label, 's': self._signature(), 'c': 1}, start)
+
+    def tap(self, x: int, y: int):
+        start = time.monotonic()
+        rs = self.ui.tap(x, y)
+        self._add({'a': 'tap', 'p': [x, y]}, start)
+        return rs
+
+    def swipe(self, x0: int, y0: int, x1: int, y1: int, duration: int = 300):
+        start = time.monotonic()
+        rs = self.ui.swipe(x0, y0, x1, y1, duration=duration)
+        self._add({'a': 'swipe', 'p': [x0, y0, x1, y1, duration]}, start)
+        return rs
+
+    def input(self, value: str):
+        # 输入内容会以明文写入轨迹
+        start = time.monotonic()
+        rs = self.ui.input(value)
+        self._add({'a': 'input', 'v': value}, start)
+        return rs
+
+    def sleep(self, seconds: float):
+        start = time.monotonic()
+        self.ui.sleep(seconds)
+        self._add({'a': 'sleep', 'v': seconds}, start)
+
+    def go_back(self):
+        start = time.monotonic()
+        self.ui.go_back()
+        self._add({'a': 'go_back'}, start)
+
+    def home(self):
+        start = time.monotonic()
+        self.ui.home()
+        self._add({'a': 'home'}, start)
+
+
+class ReplayResult:
+
+    def __init__(self):
+        self.steps = 0
+        self.checkpoints = 0
+        self.fallbacks = 0
+        self.elapsed = 0.0
+
+    def to_dict(self) -> dict:
+        return {'steps': self.steps, 'checkpoints': self.checkpoints, 'fallbacks': self.fallbacks,
+                'elapsed': round(self.elapsed, 3)}
+
+    def __repr__(self):
+        return f'<ReplayResult {self.to_dict()}>'
+
+
+class TraceReplayer:
+    """
+    回放操作轨迹：点击、滑动按录制时的坐标（按分辨率缩放）直接通过 adb input 执行，不再查找元素；
+    仅在校验点获取界面并比较签名，签名在 checkpoint_timeout 内仍不一致时，该步骤改为真实的元素查找。
+    UI 对象没有 adb 时使用其 tap/swipe。
+    """
+
+    def __init__(self, ui, trace: Trace, checkpoint_timeout: float = 5.0, fallback_timeout: float = 10.0,
+                 pace: float = 0.0):
+        """
+        :param ui: BaseUI，AndroidBaseUI 时通过 adb 执行
+        :param trace: 操作轨迹
+        :param checkpoint_timeout: 校验点等待界面签名一致的最长秒数
+        :param fallback_timeout: 回退为真实查找时等待元素的最长秒数
+        :param pace: 按录制时的步骤间隔等待的比例，0 为不等待，1 为与录制时一致
+        """
+        self.ui = ui
+        self.trace = trace
+        self.checkpoint_timeout = checkpoint_timeout
+        self.fallback_timeout = fallback_timeout
+        self.pace = pace
+        self.adb = getattr(ui, 'adb', None)
+        w, h = trace.resolution
+        sw, sh = ui.get_device_resolution()
+        self.scale = (sw / w, sh / h)
+
+    def _xy(self, x: int, y: int) -> Tuple[int, int]:
+        return round(x * self.scale[0]), round(y * self.scale[1])
+
+    def _tap(self, x: int, y: int):
+        x, y = self._xy(x, y)
+        if self.adb is None:
+            return self.ui.tap(x, y)
+        self.adb.run_shell(f'input tap {x} {y}')
+        self.ui.dev.invalidate_page_source()
+
+    def _swipe(self, x0: int, y0: int, x1: int, y1: int, duration: int):
+        x0, y0 = self._xy(x0, y0)
+        x1, y1 = self._xy(x1, y1)
+        if self.adb is None:
+            return self.ui.swipe(x0, y0, x1, y1, duration=duration)
+        self.adb.run_shell(f'input swipe {x0} {y0} {x1} {y1} {duration}')
+        self.ui.dev.invalidate_page_source()
+
+    def _check(self, step: dict, rs: ReplayResult) -> bool:
+        rs.checkpoints += 1
+        expected = step['s']
+        matched = self.ui.dev.wait_until(
+            lambda: screen_signature(self.ui.dev.get_page_source()) == expected,
+            self.checkpoint_timeout, f'checkpoint {step.get("l") or step.get("r") or ""}')
+        return bool(matched)
+
+    def run(self) -> ReplayResult:
+        rs = ReplayResult()
+        start = time.monotonic()
+        for step in self.trace.steps:
+            rs.steps += 1
+            if self.pace:
+                d = step.get('t', 0) * self.pace - (time.monotonic() - start)
+                if d > 0:
+                    self.ui.sleep(d)
+            a = step['a']
+            checked = step.get('c') and step.get('s')
+            if a == 'check':
+                if not self._check(step, rs):
+                    log.warning(f'回放校验点 `{step.get("l")}` 界面不一致')
+            elif a == 'click':
+                if (checked and not self._check(step, rs)) or not step.get('b'):
+                    rs.fallbacks += 1
+                    log.warning(f'回放界面不一致，改为查找元素：{step["r"]}')
+                    self.ui.click(step['r'], step.get('by'), timeout=self.fallback_timeout)
+                else:
+                    x0, y0, x1, y1 = step['b']
+                    self._tap((x0 + x1) // 2, (y0 + y1) // 2)
+            elif a == 'tap':
+                self._tap(*step['p'])
+            elif a == 'swipe':
+                self._swipe(*step['p'])
+            elif a == 'input':
+                self.ui.input(step['v'])
+            elif a == 'sleep':
+                self.ui.sleep(step['v'])
+            elif a in ('go_back', 'home') or a in CALL_ACTIONS:
+                getattr(self.ui, a)(*step.get('args', ()), **step.get('kw', {}))
+            else:
+                raise ValueError(f'未知的轨迹动作：{a}')
+        rs.elapsed = time.monotonic() - start
+        return rs
@@ -1,24 +1,115 @@
+from typing import Dict, Optional
+
 
 def get_android_id(app_id: str, element_id: str) -> str:
     return f'{app_id}:id/{element_id}'
 
 
+# 声明了 index=True 的资源类，用于按 resource-id 反查名称
+_indexed_classes = []
+
+
+def find_resource_name(resource_id: str) -> Optional[str]:
+    """按完整的 resource-id 反查在资源类中定义的名称，如 `LoginPage.SUBMIT_ID`，仅查找声明了 index=True 的资源类"""
+    for cls in _indexed_classes:
+        v = cls.name_of(resource_id)
+        if v:
+            return f'{cls.__name__}.{v}'
+    return None
+
+
 class AndroidResourceBase(type):
     """用于识别特定的界面元素id
-    定义的元素id类属性名称请以`_ID`结尾"""
+    定义的元素id类属性名称请以`_ID`结尾。
+    所有元素id在类创建时一次性解析为完整id（`{ROOT}:id/{id}`），未定义 ROOT 的内嵌类沿用外层类的 ROOT：
+    外层类访问到的是为其单独派生的内嵌类，不修改共用的内嵌类，子类更换 ROOT 不影响父类。
+    声明类时指定 index=True 可建立 resource-id 到名称的反查索引，如：
+        class LoginPage(metaclass=AndroidResourceBase, index=True):
+            ROOT = 'com.example'
+            SUBMIT_ID = 'btn_submit'
+    """
     ROOT = None
 
+    def __new__(mcs, name, bases, attrs, index=False):
+        return super().__new__(mcs, name, bases, attrs)
+
+    def __init__(cls, name, bases, attrs, index=False):
+        super().__init__(name, bases, attrs)
+        type.__setattr__(cls, '_inherited_root', None)
+        type.__setattr__(cls, '_nested', {})
+        type.__setattr__(cls, '_nested_of', None)
+        type.__setattr__(cls, '_index', index)
+        cls._resolve()
+        if index:
+            _indexed_classes.append(cls)
+
+    def _raw_items(cls):
+        # 按继承顺序收集原始定义，子类覆盖父类
+        rs = {}
+        for c in reversed(cls.__mro__):
+            rs.update(c.__dict__)
+        return rs
+
+    def _resolve(cls):
+        root = type.__getattribute__(cls, 'ROOT')
+        if root is None:
+            root = type.__getattribute__(cls, '_inherited_root')
+        resolved = {'ROOT': root}
+        reverse = {}
+        for k, v in cls._raw_items().items():
+            if k.endswith('_ID') and isinstance(v, str):
+                resolved[k] = rid = get_android_id(root, v)
+                reverse.setdefault(rid, k)
+            elif (isinstance(v, AndroidResourceBase) and not k.startswith('_')
+                  and type.__getattribute__(v, 'ROOT') is None):
+                resolved[k] = nested = cls._bind_nested(k, v, root)
+                for n, vn in type.__getattribute__(nested, '_reverse').items():
+                    reverse.setdefault(n, f'{k}.{vn}')
+        type.__setattr__(cls, '_resolved', resolved)
+        type.__setattr__(cls, '_reverse', reverse)
+
+    def _bind_nested(cls, name: str, nested: 'AndroidResourceBase', root: str) -> 'AndroidResourceBase':
+        # 为当前外层类派生内嵌类并沿用外层 ROOT，同一外层类重复解析时复用
+        bound = type.__getattribute__(cls, '_nested')
+        derived = bound.get(name)
+        if derived is None or type.__getattribute__(derived, '__bases__')[0] is not nested:
+            derived = type(nested)(nested.__name__, (nested,), {
+                '__module__': nested.__module__, '__qualname__': nested.__qualname__, '__doc__': nested.__doc__})
+            type.__setattr__(derived, '_nested_of', nested)
+            bound[name] = derived
+        type.__setattr__(derived, '_inherited_root', root)
+        derived._resolve()
+        return derived
+
     def get_root(cls):
-        v = object.__getattribute__(cls, 'ROOT')
-        return v
+        return type.__getattribute__(cls, '_resolved')['ROOT']
+
+    def name_of(cls, resource_id: str) -> Optional[str]:
+        """按完整 resource-id 反查名称，内嵌类的名称形如 `Inner.XXX_ID`"""
+        return type.__getattribute__(cls, '_reverse').get(resource_id)
+
+    @property
+    def resource_ids(cls) -> Dict[str, str]:
+        # 名称到完整 resource-id 的映射（不含内嵌类）
+        return {k: v for k, v in type.__getattribute__(cls, '_resolved').items() if k != 'ROOT'}
 
     def __getattribute__(cls, item: str):
-        v = object.__getattribute__(cls, item)
-        if item.endswith('_ID') and isinstance(v, str):
-            return get_android_id(cls.get_root(), v)
-        if type(v) == AndroidResourceBase:
-            if object.__getattribute__(v, 'ROOT') is None:
-                _r = cls.get_root()
-                v.ROOT = _r
-        return v
+        try:
+            return type.__getattribute__(cls, '_resolved')[item]
+        except (KeyError, AttributeError):
+            return type.__getattribute__(cls, item)
+
+    def __setattr__(cls, key, value):
+        origin = type.__getattribute__(cls, '_nested_of')
+        if origin is not None:
+            # 派生的内嵌类：修改共用的内嵌类，各外层类的派生类随之更新
+            return setattr(origin, key, value)
+        type.__setattr__(cls, key, value)
+        if key == 'ROOT' or key.endswith('_ID') or isinstance(value, AndroidResourceBase):
+            cls._refresh()
 
+    def _refresh(cls):
+        # 运行时修改了 ROOT 或元素id，重新解析自身及子类
+        cls._resolve()
+        for sub in type.__subclasses__(cls):
+            sub._refresh()
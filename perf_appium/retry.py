@@ -0,0 +1,204 @@
+import time
+import random
+import threading
+from typing import Callable, Any, Tuple, Type
+
+from .log import default as log
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, label: str, remaining: float):
+        if remaining > 0:
+            self.value = f'Circuit open, skip `{label}` for {remaining:.1f}s after repeated failures'
+        else:
+            self.value = f'Circuit half-open, skip `{label}` while a probe call is in progress'
+
+    def __str__(self):
+        return self.value
+
+
+class RetryPolicy:
+    """
+    统一的重试/恢复策略：限制最大尝试次数及总耗时，重试间隔按指数退避并加入随机抖动；
+    熔断按调用点（label）分别统计：同一调用点连续失败达到 breaker_threshold 次后熔断，在 breaker_reset 秒内该调用点的调用直接失败；
+    之后进入半开状态，只放行一次试探调用，其余调用仍直接失败，试探成功则恢复，失败则再次熔断。
+    """
+
+    def __init__(self, max_attempts: int = 5, base_delay: float = 0.5, max_delay: float = 10.0, jitter: float = 0.5,
+                 deadline: float = 60.0, breaker_threshold: int = 10, breaker_reset: float = 30.0):
+        """
+        :param max_attempts: 单次调用最多尝试次数（含首次）
+        :param base_delay: 首次重试前的等待秒数，之后每次翻倍
+        :param max_delay: 单次重试等待秒数上限
+        :param jitter: 随机抖动比例，实际等待为 delay * (1 - jitter * random())
+        :param deadline: 单次调用（含所有重试）的总耗时上限（秒）
+        :param breaker_threshold: 同一调用点连续失败多少次后熔断
+        :param breaker_reset: 熔断持续秒数
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.deadline = deadline
+        self.breaker_threshold = breaker_threshold
+        self.breaker_reset = breaker_reset
+        self.retries = {}
+        self.failures = 0
+        self._consecutive_failures = {}
+        # {调用点: 熔断截止时间}，及正在进行试探调用的调用点
+        self._open_until = {}
+        self._probing = set()
+        self._lock = threading.Lock()
+
+    def get_delay(self, attempt: int) -> float:
+        d = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return d * (1 - self.jitter * random.random())
+
+    def is_open(self, label: str) -> bool:
+        return time.monotonic() < self._open_until.get(label, 0.0)
+
+    @property
+    def circuit_open(self) -> bool:
+        # 是否有调用点处于熔断中
+        now = time.monotonic()
+        return any(now < t for t in list(self._open_until.values()))
+
+    def _check_circuit(self, label: str) -> bool:
+        """
+        熔断中或已有试探调用时抛出 CircuitOpenError
+        :return: 本次调用是否为半开状态下的试探调用
+        """
+        with self._lock:
+            until = self._open_until.get(label)
+            if until is None:
+                return False
+            remaining = until - time.monotonic()
+            if remaining > 0 or label in self._probing:
+                raise CircuitOpenError(label, remaining)
+            self._probing.add(label)
+            return True
+
+    def _end_probe(self, label: str):
+        # 试探调用因 retry_on 以外的异常结束时，允许下一次调用重新试探
+        with self._lock:
+            self._probing.discard(label)
+
+    def _open(self, label: str):
+        self._open_until[label] = time.monotonic() + self.breaker_reset
+        self._consecutive_failures.pop(label, None)
+        self._probing.discard(label)
+
+    def _on_failure(self, label: str):
+        with self._lock:
+            self.failures += 1
+            if label in self._probing:
+                self._open(label)
+                log.error(f'!!! `{label}` 试探调用失败，再次熔断 {self.breaker_reset}s')
+                return
+            n = self._consecutive_failures.get(label, 0) + 1
+            self._consecutive_failures[label] = n
+            if n >= self.breaker_threshold:
+                self._open(label)
+                log.error(f'!!! `{label}` 连续失败 {self.breaker_threshold} 次，熔断 {self.breaker_reset}s')
+
+    def note_retry(self, label: str):
+        # 记录一次重试，用于调用方自行恢复（不重复执行原操作）的场景
+        with self._lock:
+            self.retries[label] = self.retries.get(label, 0) + 1
+
+    def _on_success(self, label: str):
+        with self._lock:
+            self._consecutive_failures.pop(label, None)
+            self._open_until.pop(label, None)
+            self._probing.discard(label)
+
+    def call(self, fn: Callable[[], Any], retry_on: Tuple[Type[BaseException], ...] = (Exception,), label: str = '',
+             on_retry: Callable[[BaseException, int], Any] = None, max_attempts: int = None):
+        """
+        执行 fn，出现 retry_on 中的异常时按策略重试
+        :param fn: 要执行的函数
+        :param retry_on: 需要重试的异常类型
+        :param label: 调用点名称，用于日志及重试计数
+        :param on_retry: 每次重试前调用，参数为 (异常, 已尝试次数)，如重新连接设备
+        :param max_attempts: 本次调用的最多尝试次数，为空则使用 self.max_attempts
+        :return: fn 的返回值；重试耗尽时抛出最后一次的异常，熔断时抛出 CircuitOpenError
+        """
+        probe = self._check_circuit(label)
+        try:
+            deadline = time.monotonic() + self.deadline
+            max_attempts = max_attempts or self.max_attempts
+            attempt = 0
+            while True:
+                attempt += 1
+                try:
+                    rs = fn()
+                except retry_on as e:
+                    self._on_failure(label)
+                    delay = self.get_delay(attempt)
+                    if attempt >= max_attempts or time.monotonic() + delay > deadline or self.is_open(label):
+                        log.error(f'!!! `{label}` 失败 {attempt} 次，放弃重试：{e}')
+                        raise
+                    self.note_retry(label)
+                    log.warning(f'!!! `{label}` 第 {attempt} 次失败：{e}\n{delay:.2f}s 后重试...')
+                    time.sleep(delay)
+                    if on_retry:
+                        on_retry(e, attempt)
+                        # 回调（如重连）本身可能耗时较长，超出总耗时上限时不再重试
+                        if time.monotonic() >= deadline:
+                            log.error(f'!!! `{label}` 重试超时，放弃重试：{e}')
+                            raise e
+                    continue
+                self._on_success(label)
+                return rs
+        finally:
+            if probe:
+                self._end_probe(label)
+
+    async def acall(self, fn: Callable[[], Any], retry_on: Tuple[Type[BaseException], ...] = (Exception,),
+                    label: str = '', on_retry: Callable[[BaseException, int], Any] = None,
+                    max_attempts: int = None):
+        """
+        call 的异步版本：fn 返回 awaitable，on_retry 可以是普通函数或协程函数，重试间隔使用 asyncio.sleep
+        """
+        import asyncio
+        probe = self._check_circuit(label)
+        try:
+            deadline = time.monotonic() + self.deadline
+            max_attempts = max_attempts or self.max_attempts
+            attempt = 0
+            while True:
+                attempt += 1
+                try:
+                    rs = await fn()
+                except retry_on as e:
+                    self._on_failure(label)
+                    delay = self.get_delay(attempt)
+                    if attempt >= max_attempts or time.monotonic() + delay > deadline or self.is_open(label):
+                        log.error(f'!!! `{label}` 失败 {attempt} 次，放弃重试：{e}')
+                        raise
+                    self.note_retry(label)
+                    log.warning(f'!!! `{label}` 第 {attempt} 次失败：{e}\n{delay:.2f}s 后重试...')
+                    await asyncio.sleep(delay)
+                    if on_retry:
+                        v = on_retry(e, attempt)
+                        if asyncio.iscoroutine(v):
+                            await v
+                        # 回调（如重连）本身可能耗时较长，超出总耗时上限时不再重试
+                        if time.monotonic() >= deadline:
+                            log.error(f'!!! `{label}` 重试超时，放弃重试：{e}')
+                            raise e
+                    continue
+                self._on_success(label)
+                return rs
+        finally:
+            if probe:
+                self._end_probe(label)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'retries': dict(self.retries),
+                'failures': self.failures,
+                'circuit_open': self.circuit_open,
+                'open_circuits': [k for k, t in self._open_until.items() if time.monotonic() < t],
+            }
@@ -0,0 +1,169 @@
+import json
+import time
+import threading
+from typing import Optional, List
+
+from appium import webdriver
+from selenium.webdriver.remote.command import Command
+
+from .log import default as log
+
+
+class _AttachedRemote(webdriver.Remote):
+    # 直接绑定服务端已有的 session，不再创建新会话
+
+    def __init__(self, appium_server_url: str, session_id: str, capabilities: dict):
+        self._attach_session = (session_id, capabilities)
+        super().__init__(appium_server_url, capabilities, direct_connection=False)
+
+    def start_session(self, capabilities, browser_profile=None):
+        self.session_id, self.caps = self._attach_session
+
+
+class SessionPool:
+    """
+    Appium 会话池：以 服务地址 + 归一化后的配置 为键，保留空闲会话供新的 AppiumDevice 复用，
+    重连时优先重新绑定原 session，避免每次都重新启动 UiAutomator2。
+    空闲会话超过 idle_timeout 或空闲数超过 max_idle 时会被关闭。
+    """
+
+    def __init__(self, max_idle: int = 8, idle_timeout: float = 600.0):
+        """
+        :param max_idle: 最多保留的空闲会话数
+        :param idle_timeout: 空闲会话保留秒数
+        """
+        self.max_idle = max_idle
+        self.idle_timeout = idle_timeout
+        self.hits = 0
+        self.misses = 0
+        self._idle = {}  # type: Dict[str, List[Tuple[float, webdriver.Remote]]]
+        self._keys = {}  # type: Dict[str, str]
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize_url(appium_server_url: str = None) -> str:
+        return (appium_server_url or 'http://localhost:4723/wd/hub').rstrip('/')
+
+    @classmethod
+    def make_key(cls, appium_server_url: str, capabilities: dict) -> str:
+        caps = {k[len('appium:'):] if k.startswith('appium:') else k: v for k, v in capabilities.items()}
+        return f'{cls.normalize_url(appium_server_url)}|{json.dumps(caps, sort_keys=True, default=str)}'
+
+    @staticmethod
+    def is_alive(driver: webdriver.Remote) -> bool:
+        # 须请求到设备端驱动（UiAutomator2），/timeouts 等由 Appium 服务直接应答的请求无法发现驱动已崩溃
+        try:
+            driver.execute(Command.GET_WINDOW_RECT)
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _quit(driver: webdriver.Remote):
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def _evict(self) -> List[webdriver.Remote]:
+        # 需在锁内调用，返回需要关闭的会话
+        now = time.monotonic()
+        expired = []
+        for key in list(self._idle):
+            items = self._idle[key]
+            keep = [(t, d) for t, d in items if now - t < self.idle_timeout]
+            expired.extend(d for t, d in items if now - t >= self.idle_timeout)
+            if keep:
+                self._idle[key] = keep
+            else:
+                del self._idle[key]
+        idle = sorted(((t, k, d) for k, items in self._idle.items() for t, d in items), key=lambda i: i[0])
+        while len(idle) > self.max_idle:
+            t, k, d = idle.pop(0)
+            self._idle[k].remove((t, d))
+            if not self._idle[k]:
+                del self._idle[k]
+            expired.append(d)
+        for d in expired:
+            self._keys.pop(d.session_id, None)
+        return expired
+
+    def acquire(self, appium_server_url: str = None, capabilities: dict = None) -> webdriver.Remote:
+        """
+        获取会话：优先复用同配置的空闲会话，否则新建
+        :param appium_server_url: Appium服务端地址
+        :param capabilities: Appium 配置
+        :return: webdriver.Remote
+        """
+        capabilities = capabilities or {}
+        key = self.make_key(appium_server_url, capabilities)
+        with self._lock:
+            expired = self._evict()
+            candidates = self._idle.pop(key, [])
+        for d in expired:
+            self._quit(d)
+        while candidates:
+            t, d = candidates.pop()
+            if self.is_alive(d):
+                with self._lock:
+                    self.hits += 1
+                    if candidates:
+                        self._idle.setdefault(key, []).extend(candidates)
+                log.debug(f'Appium session pool reuse session [{d.session_id}]')
+                return d
+            self.discard(d)
+        driver = webdriver.Remote(self.normalize_url(appium_server_url), capabilities)
+        with self._lock:
+            self.misses += 1
+            self._keys[driver.session_id] = key
+        return driver
+
+    def reattach(self, appium_server_url: str, session_id: str, capabilities: dict) -> Optional[webdriver.Remote]:
+        """
+        重新绑定服务端仍然存活的 session，失败则返回 None
+        """
+        try:
+            driver = _AttachedRemote(self.normalize_url(appium_server_url), session_id, capabilities)
+        except Exception as e:
+            log.warning(f'Appium session [{session_id}] reattach failed: {e}')
+            return None
+        if not self.is_alive(driver):
+            return None
+        with self._lock:
+            self._keys.setdefault(session_id, self.make_key(appium_server_url, capabilities.get('desired', {})))
+        log.info(f'Appium session [{session_id}] reattached')
+        return driver
+
+    def release(self, driver: webdriver.Remote):
+        """归还会话，保持空闲以便复用；不是由本池创建的会话直接关闭"""
+        with self._lock:
+            key = self._keys.get(driver.session_id)
+            if key is not None:
+                self._idle.setdefault(key, []).append((time.monotonic(), driver))
+            expired = self._evict()
+        if key is None:
+            expired.append(driver)
+        for d in expired:
+            self._quit(d)
+
+    def discard(self, driver: webdriver.Remote):
+        """关闭并丢弃会话"""
+        with self._lock:
+            self._keys.pop(driver.session_id, None)
+        self._quit(driver)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'idle': sum(len(i) for i in self._idle.values()),
+            }
+
+    def close(self):
+        with self._lock:
+            drivers = [d for items in self._idle.values() for t, d in items]
+            self._idle.clear()
+            self._keys.clear()
+        for d in drivers:
+            self._quit(d)
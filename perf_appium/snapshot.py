@@ -0,0 +1,74 @@
+import time
+import threading
+from contextlib import contextmanager
+from typing import Optional
+
+
+class PageSnapshot:
+    # page_source 快照缓存：在可能改变界面的操作（点击、滑动、重连、adb输入等）发生之前，复用同一份 page_source，
+    # 避免每次元素查找都完整下载一次界面结构
+
+    def __init__(self, ttl: float = 1.0):
+        """
+        :param ttl: 快照有效秒数，超时后强制重新获取。为 0 或负数则不缓存；为 None 则只在操作后失效
+        """
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._source = None
+        self._time = 0.0
+        self._held = 0
+        self._lock = threading.Lock()
+
+    def _expired(self) -> bool:
+        if self.ttl is None:
+            return False
+        return time.monotonic() - self._time >= self.ttl
+
+    def get(self) -> Optional[str]:
+        """获取仍然有效的快照，无效则返回 None 并记为一次未命中"""
+        with self._lock:
+            if self._source is not None and (self._held or not self._expired()):
+                self.hits += 1
+                return self._source
+            self.misses += 1
+            return None
+
+    def update(self, source: str):
+        with self._lock:
+            self._source = source
+            self._time = time.monotonic()
+
+    @contextmanager
+    def hold(self):
+        """
+        期间快照不因 ttl 过期（ttl 为 0 时也复用），用于一轮判断中的多次查找共用同一份界面结构；
+        进入时快照已过期则丢弃，第一次查找时重新获取
+        """
+        with self._lock:
+            if not self._held and self._expired():
+                self._source = None
+            self._held += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._held -= 1
+
+    def invalidate(self):
+        with self._lock:
+            self._source = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': total and self.hits / total or 0.0,
+            }
+
+    def reset_stats(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
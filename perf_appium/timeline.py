@@ -0,0 +1,135 @@
+import json
+import time
+import threading
+from contextlib import contextmanager
+from typing import Any, List, Optional
+
+
+class _Ring:
+    # 预分配的环形缓冲区，写满后覆盖最早的记录
+    __slots__ = ('capacity', 'items', 'written')
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.items = [None] * capacity
+        self.written = 0
+
+    def put(self, item: tuple):
+        self.items[self.written % self.capacity] = item
+        self.written += 1
+
+    def snapshot(self) -> List[tuple]:
+        n = self.written
+        if n <= self.capacity:
+            return self.items[:n]
+        i = n % self.capacity
+        return self.items[i:] + self.items[:i]
+
+    @property
+    def dropped(self) -> int:
+        return max(0, self.written - self.capacity)
+
+    def clear(self):
+        self.items = [None] * self.capacity
+        self.written = 0
+
+
+class UITimeline:
+    """
+    界面操作时间线：点击、滑动、输入等操作以 (单调时间戳, 操作, 定位符, 耗时) 写入预分配的环形缓冲区，
+    每条记录只有一次加锁及元组赋值，开销在微秒级，不影响所标注的性能数据；
+    性能采样（如 AndroidPerfBaseHelper.on_test_cpu_memory 收到的数据）写入另一个缓冲区，
+    export 时按时间合并为一条时间线，用于定位性能波动由哪个操作引起。
+    """
+
+    def __init__(self, capacity: int = 4096, sample_capacity: int = 4096, enabled=True):
+        """
+        :param capacity: 最多保留的操作记录数，超出后覆盖最早的记录
+        :param sample_capacity: 最多保留的性能采样数
+        :param enabled: 是否启用
+        """
+        self.enabled = enabled
+        self._actions = _Ring(capacity)
+        self._samples = _Ring(sample_capacity)
+        self._lock = threading.Lock()
+        # 单调时间与系统时间的对应关系，导出时换算为系统时间，便于与其他数据对齐
+        self._mono0 = time.monotonic()
+        self._wall0 = time.time()
+
+    def record(self, action: str, locator: str = None, start: float = None, duration: float = 0.0):
+        """
+        :param action: 操作名称
+        :param locator: 定位符或坐标等
+        :param start: 开始时的 time.monotonic()，为空则为当前时间
+        :param duration: 耗时秒数
+        """
+        if not self.enabled:
+            return
+        if start is None:
+            start = time.monotonic()
+        with self._lock:
+            self._actions.put((start, action, locator, duration))
+
+    @contextmanager
+    def span(self, action: str, locator: str = None):
+        # 记录代码块的开始时间及耗时，异常时同样记录
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.record(action, locator, start, time.monotonic() - start)
+
+    def record_sample(self, kind: str, data: Any, second: int = None, ts: float = None):
+        """
+        :param kind: 采样类型，如 cpu_memory
+        :param data: 采样数据
+        :param second: 采样所在的测试秒数
+        :param ts: 采样时的 time.monotonic()，为空则为当前时间
+        """
+        if not self.enabled:
+            return
+        if ts is None:
+            ts = time.monotonic()
+        with self._lock:
+            self._samples.put((ts, kind, second, data))
+
+    def __len__(self):
+        return min(self._actions.written, self._actions.capacity)
+
+    @property
+    def dropped(self) -> int:
+        # 被覆盖的操作记录数
+        return self._actions.dropped
+
+    def _time(self, ts: float) -> float:
+        return round(self._wall0 + ts - self._mono0, 6)
+
+    def actions(self) -> List[dict]:
+        with self._lock:
+            items = self._actions.snapshot()
+        return [{'ts': ts, 'time': self._time(ts), 'type': 'ui', 'action': action, 'locator': locator,
+                 'ms': round(duration * 1000, 3)} for ts, action, locator, duration in items]
+
+    def samples(self) -> List[dict]:
+        with self._lock:
+            items = self._samples.snapshot()
+        return [{'ts': ts, 'time': self._time(ts), 'type': 'perf', 'kind': kind, 'second': second, 'data': data}
+                for ts, kind, second, data in items]
+
+    def export(self, path: Optional[str] = None) -> List[dict]:
+        """
+        按时间合并操作记录与性能采样
+        :param path: 指定则每条记录写一行 json 到该文件
+        :return: 按时间排序的记录列表
+        """
+        rs = sorted(self.actions() + self.samples(), key=lambda e: e['ts'])
+        if path:
+            with open(path, 'w', encoding='utf-8') as f:
+                for e in rs:
+                    f.write(json.dumps(e, ensure_ascii=False, default=str) + '\n')
+        return rs
+
+    def clear(self):
+        with self._lock:
+            self._actions.clear()
+            self._samples.clear()
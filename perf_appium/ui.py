@@ -1,10 +1,23 @@
 import time
 import abc
-from typing import Union, List
+import functools
+from typing import Union, List, Sequence, Tuple, Optional, Any
 
 from appium.webdriver.webelement import WebElement
 
 from .appium_device import AppiumDevice
+from .metrics import SLEEP
+
+
+class _instance_or_static:
+    # 实例调用时传入实例；通过类调用时传入 None，兼容原有静态方法的调用方式，如 `BaseUI.sleep(1)`
+
+    def __init__(self, fn):
+        self.fn = fn
+        functools.update_wrapper(self, fn)
+
+    def __get__(self, obj, cls=None):
+        return functools.partial(self.fn, obj)
 
 
 class BaseUI(metaclass=abc.ABCMeta):
@@ -24,22 +37,42 @@ class BaseUI(metaclass=abc.ABCMeta):
     def find_elements_by_xpath(self, value: str, view_tag=None, key=None, is_contains=False):
         return self.dev.find_elements_by_xpath(value, view_tag, key, is_contains)
 
-    def exist(self, resource: str, by: str = None, timeout: int = None):
+    def exist(self, resource: str, by: str = None, timeout: float = None):
         return self.dev.exist(resource, by, timeout)
 
-    def click(self, resource: str, by: str = None, on_exists=False, timeout: int = None):
+    def exist_any(self, resources: Sequence[Union[str, Tuple[str, Optional[str]]]],
+                  timeout: float = None) -> Tuple[int, Any]:
+        return self.dev.exist_any(resources, timeout)
+
+    def wait_until(self, fn, timeout: float = None, label: str = ''):
+        return self.dev.wait_until(fn, timeout, label)
+
+    def wait_until_idle(self, quiet: float = 0.5, timeout: float = 5.0):
+        return self.dev.wait_until_idle(quiet, timeout)
+
+    def click(self, resource: str, by: str = None, on_exists=False, timeout: float = None):
         return self.dev.click(resource, by, on_exists, timeout)
 
     @abc.abstractmethod
     def input(self, value: str):
         raise NotImplementedError
 
-    def match_content(self, resource: str, txt_or_re, by: str = None, on_exists=False, timeout: int = None) -> bool:
+    def match_content(self, resource: str, txt_or_re, by: str = None, on_exists=False, timeout: float = None) -> bool:
         return self.dev.match_content(resource, txt_or_re, by, on_exists, timeout)
 
     def swipe(self, x0: int, y0: int, x1: int, y1: int, duration: int = 300):
         return self.dev.swipe(x0, y0, x1, y1, duration=duration)
 
+    def tap(self, x: int, y: int):
+        return self.dev.tap(x, y)
+
+    def get_screen_size(self) -> Optional[Tuple[int, int]]:
+        # 屏幕宽高，为空则由 Appium 服务获取
+        return None
+
+    def scroll_to(self, resource: str, by: str = None, direction: str = 'down', max_swipes: int = 20):
+        return self.dev.scroll_to(resource, by, direction, max_swipes, screen=self.get_screen_size())
+
     @abc.abstractmethod
     def get_device_resolution(self) -> (int, int):
         raise NotImplementedError
@@ -47,6 +80,10 @@ class BaseUI(metaclass=abc.ABCMeta):
     def quit(self):
         return self.dev.quit()
 
-    @staticmethod
-    def sleep(seconds: int):
-        time.sleep(seconds)
+    @_instance_or_static
+    def sleep(self, seconds: float):
+        # 通过类调用（原静态方法）时没有设备，不统计耗时
+        if self is None:
+            return time.sleep(seconds)
+        with self.dev.timeline.span('sleep'), self.dev.metrics.timed(SLEEP, 'sleep'):
+            time.sleep(seconds)
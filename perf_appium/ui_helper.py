@@ -1,30 +1,72 @@
 import abc
 from functools import wraps
+from typing import Callable, Dict, Tuple
 
 from .android_ui import AndroidBaseUI as _AndroidBaseUI, DeviceOsOperation
 
+# (UI 类, 设备适配类) -> 设备适配类覆盖的操作名称
+_dispatch_tables = {}  # type: Dict[Tuple[type, type], Tuple[str, ...]]
+
+
+def _get_overridden(ui_cls: type, dev_cls: type) -> Tuple[str, ...]:
+    k = (ui_cls, dev_cls)
+    rs = _dispatch_tables.get(k)
+    if rs is None:
+        ops = [n for n in dir(ui_cls) if getattr(getattr(ui_cls, n, None), 'device_ui_call', False)]
+        rs = _dispatch_tables[k] = tuple(n for n in ops if hasattr(dev_cls, n))
+    return rs
+
 
 def call_device_ui(func):
-    # 适配不同设备的情况
+    # 适配不同设备的情况，设备适配类中有同名方法时优先调用
+    n = func.__name__
+
     @wraps(func)
-    def wrapper(ui, *args):
-        assert isinstance(ui, AndroidBaseUI)
-        dev = ui.get_device_ui()
-        n = func.__name__
-        fn = getattr(dev, n) if hasattr(dev, n) else None
+    def wrapper(ui, *args, **kwargs):
+        fn = ui.get_device_calls().get(n)
         if fn:
-            return fn(*args)
-        return func(ui, *args)
+            return fn(*args, **kwargs)
+        return func(ui, *args, **kwargs)
 
+    wrapper.device_ui_call = True
     return wrapper
 
 
 class AndroidBaseUI(_AndroidBaseUI, metaclass=abc.ABCMeta):
+    _device_ui = None
+    _device_calls = None  # type: Dict[str, Callable]
 
     @abc.abstractmethod
     def get_device_ui(self) -> DeviceOsOperation:
         raise NotImplementedError
 
+    @property
+    def device_ui(self) -> DeviceOsOperation:
+        # 缓存的设备适配对象
+        self.get_device_calls()
+        return self._device_ui
+
+    def get_device_calls(self) -> Dict[str, Callable]:
+        """
+        设备适配对象覆盖的操作：{操作名称: 设备适配对象的方法}
+        首次调用时取得设备适配对象并建立分派表，之后直接复用
+        """
+        rs = self._device_calls
+        if rs is None:
+            dev = self.get_device_ui()
+            self._device_ui = dev
+            rs = self._device_calls = {n: getattr(dev, n) for n in _get_overridden(type(self), type(dev))}
+        return rs
+
+    def get_overridden_operations(self) -> Tuple[str, ...]:
+        # 由设备适配对象覆盖的操作名称
+        return tuple(sorted(self.get_device_calls()))
+
+    def reset_device_ui(self):
+        # 设备适配对象需要变更时调用，下次操作时重新调用 get_device_ui
+        self._device_ui = None
+        self._device_calls = None
+
     @call_device_ui
     def install_app(self, file_path: str):
         return super().install_app(file_path)
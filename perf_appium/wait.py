@@ -0,0 +1,157 @@
+import time
+import threading
+from collections import deque
+from typing import Callable, Any, Optional
+
+from .log import default as log
+
+
+class WaitResult:
+    # 一次等待的结果，布尔值与等到的值一致
+    __slots__ = ('label', 'value', 'elapsed', 'attempts', 'slept')
+
+    def __init__(self, label: str, value: Any, elapsed: float, attempts: int, slept: float = 0.0):
+        self.label = label
+        self.value = value
+        self.elapsed = elapsed
+        self.attempts = attempts
+        self.slept = slept
+
+    def __bool__(self):
+        return bool(self.value)
+
+    def __repr__(self):
+        return (f'<WaitResult {self.label!r} matched={bool(self.value)} '
+                f'elapsed={self.elapsed:.3f}s attempts={self.attempts}>')
+
+
+class Waiter:
+    # 基于单调时钟截止时间的轮询等待：立即判断一次，之后按退避间隔轮询直到截止时间
+
+    def __init__(self, interval: float = 0.05, max_interval: float = 1.0, backoff: float = 2.0, history: int = 200):
+        """
+        :param interval: 首次轮询间隔（秒）
+        :param max_interval: 最大轮询间隔（秒）
+        :param backoff: 每次未命中后间隔的增长倍数
+        :param history: 保留最近多少次等待记录
+        """
+        self.interval = interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.records = deque(maxlen=history)
+        self._lock = threading.Lock()
+
+    def wait(self, fn: Callable[[], Any], timeout: Optional[float], label: str = '',
+             on_retry: Callable[[], Any] = None) -> WaitResult:
+        """
+        轮询执行 fn 直到返回真值或超时
+        :param fn: 判断函数
+        :param timeout: 超时秒数，支持小数；为空或 0 则只判断一次
+        :param label: 等待的描述，用于记录
+        :param on_retry: 每次重新判断前调用，如丢弃界面快照
+        :return: WaitResult
+        """
+        start = time.monotonic()
+        deadline = start + (timeout or 0)
+        delay = self.interval
+        attempts = 0
+        slept = 0.0
+        while True:
+            attempts += 1
+            v = fn()
+            if v:
+                break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            d = min(delay, remaining)
+            time.sleep(d)
+            slept += d
+            delay = min(delay * self.backoff, self.max_interval)
+            if on_retry:
+                on_retry()
+        return self._record(label, v, start, attempts, slept, timeout)
+
+    async def wait_async(self, fn: Callable[[], Any], timeout: Optional[float], label: str = '',
+                         on_retry: Callable[[], Any] = None) -> WaitResult:
+        """
+        wait 的异步版本：fn 返回 awaitable，轮询间隔使用 asyncio.sleep，不占用线程
+        """
+        import asyncio
+        start = time.monotonic()
+        deadline = start + (timeout or 0)
+        delay = self.interval
+        attempts = 0
+        slept = 0.0
+        while True:
+            attempts += 1
+            v = await fn()
+            if v:
+                break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            d = min(delay, remaining)
+            await asyncio.sleep(d)
+            slept += d
+            delay = min(delay * self.backoff, self.max_interval)
+            if on_retry:
+                on_retry()
+        return self._record(label, v, start, attempts, slept, timeout)
+
+    def wait_stable(self, fn: Callable[[], Any], quiet: float, timeout: float, label: str = '',
+                    interval: float = None) -> WaitResult:
+        """
+        轮询执行 fn 直到其返回值连续 quiet 秒保持不变（如界面结构的哈希），或超过 timeout
+        :param fn: 取值函数，返回值需可比较
+        :param quiet: 返回值保持不变多少秒视为稳定
+        :param timeout: 最长等待秒数
+        :param label: 等待的描述，用于记录
+        :param interval: 轮询间隔，默认为 self.interval
+        :return: WaitResult，稳定时 value 为 True，超时则为 None
+        """
+        start = time.monotonic()
+        deadline = start + timeout
+        interval = interval or self.interval
+        attempts = 0
+        slept = 0.0
+        last = since = None
+        stable = None
+        while True:
+            attempts += 1
+            v = fn()
+            now = time.monotonic()
+            if attempts == 1 or v != last:
+                last, since = v, now
+            elif now - since >= quiet:
+                stable = True
+                break
+            remaining = deadline - now
+            if remaining <= 0:
+                break
+            d = min(interval, remaining)
+            time.sleep(d)
+            slept += d
+        return self._record(label, stable, start, attempts, slept, timeout)
+
+    def _record(self, label: str, v: Any, start: float, attempts: int, slept: float,
+                timeout: Optional[float]) -> WaitResult:
+        rs = WaitResult(label, v, time.monotonic() - start, attempts, slept)
+        with self._lock:
+            self.records.append(rs)
+        if timeout:
+            log.debug(f'wait {rs}')
+        return rs
+
+    def summary(self) -> dict:
+        # 汇总最近的等待记录，便于找出耗时长的界面流程
+        with self._lock:
+            records = list(self.records)
+        rs = {}
+        for r in records:
+            v = rs.setdefault(r.label, {'count': 0, 'matched': 0, 'total': 0.0, 'max': 0.0})
+            v['count'] += 1
+            v['matched'] += bool(r.value)
+            v['total'] += r.elapsed
+            v['max'] = max(v['max'], r.elapsed)
+        return rs
@@ -19,8 +19,11 @@ setup(
     keywords=['android', 'ios', 'appium', 'performance'],
     data_files=['requirements.txt'],
     install_requires=parse_requirements('requirements.txt'),
+    python_requires='>=3.7',
+    extras_require={
+        'async': ['aiohttp>=3.7'],
+    },
     classifiers=[
-        'Programming Language :: Python :: 3.6',
         'Programming Language :: Python :: 3.7',
         'Programming Language :: Python :: 3.8',
         'Programming Language :: Python :: 3.9',